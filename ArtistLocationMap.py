@@ -5,112 +5,162 @@
 
 import music
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.colors import LinearSegmentedColormap
-
-# Get music data
-data = music.get_music()
-
-# Extract artist locations
-artist_names = []
-latitudes = []
-longitudes = []
-popularity = []
-
-for record in data:
-    artist_data = record['artist']
-    name = artist_data.get('name')
-    lat = artist_data.get('latitude')
-    lon = artist_data.get('longitude')
-    pop = artist_data.get('hotttnesss')
-    
-    if name and lat is not None and lon is not None and pop is not None:
-        artist_names.append(name)
-        latitudes.append(lat)
-        longitudes.append(lon)
-        popularity.append(pop * 100)  # Scale to 0-100
-
-# Create DataFrame
-artist_df = pd.DataFrame({
-    'Artist': artist_names,
-    'Latitude': latitudes,
-    'Longitude': longitudes,
-    'Popularity': popularity
-})
-
-# Drop any rows with missing data
-artist_df = artist_df.dropna()
-
-print(f"Found {len(artist_df)} artists with valid location data")
-
-# Create a world map
-plt.figure(figsize=(14, 8))
-
-# Set up the map background
-plt.title('Global Distribution of Artists by Popularity', fontsize=16)
-plt.xlabel('Longitude', fontsize=12)
-plt.ylabel('Latitude', fontsize=12)
-
-# Set map boundaries
-plt.xlim(-180, 180)
-plt.ylim(-90, 90)
-
-# Draw gridlines
-plt.grid(alpha=0.3)
-
-# Create custom colormap
-colors = [(0.5, 0.5, 0.9), (0.9, 0.2, 0.2)]  # Light blue to red
-cmap = LinearSegmentedColormap.from_list('custom_cmap', colors, N=100)
-
-# Draw scatter plot with popularity as size and color
-scatter = plt.scatter(
-    artist_df['Longitude'], 
-    artist_df['Latitude'],
-    c=artist_df['Popularity'],
-    s=artist_df['Popularity'] * 2,  # Adjust size by popularity
-    alpha=0.7,
-    cmap=cmap,
-    edgecolors='black',
-    linewidths=0.5
-)
-
-# Add a colorbar
-cbar = plt.colorbar(scatter)
-cbar.set_label('Artist Popularity Score (0-100)', fontsize=12)
-
-# Add contour lines for continents (very simplified)
-# This is just to give an idea of where the continents are
-continents_x = [-100, -70, 0, 30, 100, 140]
-continents_y = [40, -20, 50, 0, 30, -30]
-plt.plot(continents_x, continents_y, 'k-', alpha=0.3, linewidth=1)
-
-# Save the figure
-plt.tight_layout()
-plt.savefig('artist_location_map.png')
-
-print("Map created and saved as 'artist_location_map.png'")
-
-# Analysis of artists by region
-# Define rough regions
-def get_region(lon, lat):
-    if lon < -30:
-        return "Americas"
-    elif lon < 60:
-        return "Europe/Africa"
+import artist_geography
+from Visualization import MAP_POINT_THRESHOLD
+
+def extract_artist_locations(store=None):
+    """
+    Extract artist names, coordinates and popularity straight from the columnar dataset.
+
+    Args:
+        store (music.MusicColumns, optional): The dataset. If None, music.get_music_columns().
+
+    Returns:
+        pandas.DataFrame: Artist, Latitude, Longitude and Popularity (0-100) for every
+            record with a name, a location and a popularity value
+    """
+    if store is None:
+        store = music.get_music_columns()
+
+    names = store.column('artist.name')
+    latitudes = store.columns['artist.latitude']
+    longitudes = store.columns['artist.longitude']
+    popularity = store.columns['artist.hotttnesss']
+
+    # Keep records with a name, both coordinates and a popularity value
+    valid = ~np.isnan(latitudes) & ~np.isnan(longitudes) & ~np.isnan(popularity)
+    valid &= np.array([bool(name) for name in store.categories['artist.name']])[store.columns['artist.name']]
+
+    return pd.DataFrame({
+        'Artist': names[valid],
+        'Latitude': latitudes[valid],
+        'Longitude': longitudes[valid],
+        'Popularity': popularity[valid] * 100  # Scale to 0-100
+    })
+
+def regional_stats(artist_df, edges=None, names=None):
+    """
+    Count artists and average their popularity per region in a single groupby.
+
+    Args:
+        artist_df (pandas.DataFrame): Result of extract_artist_locations
+        edges (list, optional): Longitude boundaries between regions. Defaults to artist_geography.REGION_EDGES.
+        names (list, optional): Region names. Defaults to artist_geography.REGION_NAMES.
+
+    Returns:
+        pandas.DataFrame: 'count' and 'mean_popularity' per region that has artists
+    """
+    regions = artist_geography.assign_regions(artist_df['Longitude'], edges, names)
+    stats = artist_df['Popularity'].groupby(regions, observed=True).agg(['count', 'mean'])
+    return stats.rename(columns={'mean': 'mean_popularity'})
+
+# Most grid cells the binned map draws; the cells are made coarser until they fit
+MAP_CELL_LIMIT = 5000
+
+def plot_artist_locations(artist_df, path='artist_location_map.png', max_points=MAP_POINT_THRESHOLD, cell_degrees=2.0):
+    """
+    Draw the artist scatter map and save it.
+
+    Args:
+        artist_df (pandas.DataFrame): Result of extract_artist_locations
+        path (str, optional): Where to save the figure. Defaults to 'artist_location_map.png'.
+        max_points (int, optional): Above this many artists, draw one marker per lat/lon grid
+            cell (sized by artist count, coloured by mean popularity). Defaults to
+            Visualization.MAP_POINT_THRESHOLD, shared with the interactive map.
+        cell_degrees (float, optional): Grid cell size in degrees for the binned map, doubled
+            while it gives more than MAP_CELL_LIMIT non-empty cells. Defaults to 2.0.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+
+    # Create a world map
+    plt.figure(figsize=(14, 8))
+
+    # Set up the map background
+    plt.title('Global Distribution of Artists by Popularity', fontsize=16)
+    plt.xlabel('Longitude', fontsize=12)
+    plt.ylabel('Latitude', fontsize=12)
+
+    # Set map boundaries
+    plt.xlim(-180, 180)
+    plt.ylim(-90, 90)
+
+    # Draw gridlines
+    plt.grid(alpha=0.3)
+
+    # Create custom colormap
+    colors = [(0.5, 0.5, 0.9), (0.9, 0.2, 0.2)]  # Light blue to red
+    cmap = LinearSegmentedColormap.from_list('custom_cmap', colors, N=100)
+
+    if len(artist_df) > max_points:
+        # Draw pre-binned cells: size by artist count, color by mean popularity
+        cells = artist_geography.grid_density(artist_df['Latitude'], artist_df['Longitude'],
+                                              artist_df['Popularity'], cell_degrees)
+        while len(cells) > MAP_CELL_LIMIT:
+            # Drawing each edged marker dominates the render, so keep their number bounded
+            cell_degrees *= 2
+            cells = artist_geography.grid_density(artist_df['Latitude'], artist_df['Longitude'],
+                                                  artist_df['Popularity'], cell_degrees)
+        scatter = plt.scatter(
+            cells['longitude'],
+            cells['latitude'],
+            c=cells['mean'],
+            s=200 * np.sqrt(cells['count'] / cells['count'].max()),  # Area grows with artist count
+            alpha=0.7,
+            cmap=cmap,
+            edgecolors='black',
+            linewidths=0.5
+        )
     else:
-        return "Asia/Pacific"
-
-artist_df['Region'] = artist_df.apply(lambda row: get_region(row['Longitude'], row['Latitude']), axis=1)
-
-# Count artists by region
-region_counts = artist_df['Region'].value_counts()
-print("\nArtist distribution by region:")
-for region, count in region_counts.items():
-    print(f"- {region}: {count} artists")
-
-# Calculate average popularity by region
-region_popularity = artist_df.groupby('Region')['Popularity'].mean()
-print("\nAverage artist popularity by region:")
-for region, avg_pop in region_popularity.items():
-    print(f"- {region}: {avg_pop:.2f}")
\ No newline at end of file
+        # Draw scatter plot with popularity as size and color
+        scatter = plt.scatter(
+            artist_df['Longitude'],
+            artist_df['Latitude'],
+            c=artist_df['Popularity'],
+            s=artist_df['Popularity'] * 2,  # Adjust size by popularity
+            alpha=0.7,
+            cmap=cmap,
+            edgecolors='black',
+            linewidths=0.5
+        )
+
+    # Add a colorbar
+    cbar = plt.colorbar(scatter)
+    cbar.set_label('Artist Popularity Score (0-100)', fontsize=12)
+
+    # Add contour lines for continents (very simplified)
+    # This is just to give an idea of where the continents are
+    continents_x = [-100, -70, 0, 30, 100, 140]
+    continents_y = [40, -20, 50, 0, 30, -30]
+    plt.plot(continents_x, continents_y, 'k-', alpha=0.3, linewidth=1)
+
+    # Save the figure
+    plt.tight_layout()
+    plt.savefig(path)
+
+def main():
+    # Extract artist locations
+    artist_df = extract_artist_locations()
+
+    print(f"Found {len(artist_df)} artists with valid location data")
+
+    plot_artist_locations(artist_df, 'artist_location_map.png')
+
+    print("Map created and saved as 'artist_location_map.png'")
+
+    # Analysis of artists by region
+    stats = regional_stats(artist_df)
+
+    # Count artists by region
+    print("\nArtist distribution by region:")
+    for region, count in stats['count'].sort_values(ascending=False).items():
+        print(f"- {region}: {count} artists")
+
+    # Calculate average popularity by region
+    print("\nAverage artist popularity by region:")
+    for region, avg_pop in stats['mean_popularity'].sort_index(key=lambda index: index.astype(str)).items():
+        print(f"- {region}: {avg_pop:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,56 @@
-import matplotlib.pyplot as plt
+import sys
+import warnings
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import streamlit as st
+import aggregate_cube
+import artist_geography
+import histograms
+import instrumentation
 
+# Plotting libraries and Streamlit are imported inside the functions that use them,
+# so importing this module (e.g. for a headless batch job) stays cheap
+
+def _show_error(message):
+    """Show an error in the running Streamlit app, or warn when there is none."""
+    if 'streamlit' in sys.modules:
+        sys.modules['streamlit'].error(message)
+    else:
+        warnings.warn(message)
+
+@instrumentation.instrument
 def set_plot_style():
     """Set the visual style for matplotlib plots"""
+    import matplotlib.pyplot as plt
     plt.style.use('seaborn-v0_8-whitegrid')
     
-def plot_decade_trend(df):
+@instrumentation.instrument
+def plot_decade_trend(df, cube=None):
     """
     Create a line plot showing music trends over decades.
     
     Args:
         df (pandas.DataFrame): The prepared music dataframe with a 'decade' column
+        cube (aggregate_cube.AggregateCube, optional): Precomputed aggregates of df.
+            If None, the cube shared through aggregate_cube.cube_for is used.
         
     Returns:
         fig: A matplotlib figure object
     """
     if 'decade' not in df.columns or 'song_hotttnesss' not in df.columns:
-        st.error("Required columns for decade trend visualization are missing!")
+        _show_error("Required columns for decade trend visualization are missing!")
         return None
     
-    # Group by decade and calculate mean hotttnesss
-    decade_data = df.groupby('decade')['song_hotttnesss'].agg(['mean', 'count']).reset_index()
+    # Read mean hotttnesss and song counts per decade from the aggregate cube
+    if cube is None:
+        cube = aggregate_cube.cube_for(df)
+    decade_data = pd.DataFrame({
+        'mean': cube.mean('decade')['song_hotttnesss'],
+        'count': cube.count('decade')['song_hotttnesss']
+    }).rename_axis('decade').reset_index()
     decade_data = decade_data[decade_data['count'] > 10]  # Filter out decades with too few songs
     
     # Create the figure
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(10, 6))
     
     ax.plot(decade_data['decade'], decade_data['mean'], marker='o', linewidth=2)
@@ -57,6 +80,7 @@ def plot_decade_trend(df):
     plt.tight_layout()
     return fig
 
+@instrumentation.instrument
 def plot_key_distribution(df):
     """
     Create a bar chart showing the distribution of music keys.
@@ -68,7 +92,7 @@ def plot_key_distribution(df):
         fig: A matplotlib figure object
     """
     if 'song_key' not in df.columns:
-        st.error("Required column 'song_key' for key distribution visualization is missing!")
+        _show_error("Required column 'song_key' for key distribution visualization is missing!")
         return None
     
     # Map numeric keys to musical notation
@@ -98,6 +122,7 @@ def plot_key_distribution(df):
     key_counts = key_counts.sort_values('key')
     
     # Create the plot
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # Plot horizontal bars
@@ -120,6 +145,7 @@ def plot_key_distribution(df):
     plt.tight_layout()
     return fig
 
+@instrumentation.instrument
 def create_tempo_histogram(df):
     """
     Create a histogram showing the distribution of song tempos.
@@ -131,18 +157,14 @@ def create_tempo_histogram(df):
         fig: A plotly figure object
     """
     if 'song_tempo' not in df.columns:
-        st.error("Required column 'song_tempo' for tempo histogram is missing!")
+        _show_error("Required column 'song_tempo' for tempo histogram is missing!")
         return None
     
-    # Create histogram with Plotly
-    fig = px.histogram(
-        df, 
-        x='song_tempo',
-        nbins=30,
-        title='Distribution of Song Tempos (BPM)',
-        labels={'song_tempo': 'Tempo (BPM)'},
-        color_discrete_sequence=['#3366CC']
-    )
+    # Render from precomputed bin counts (cached per frame and bin spec)
+    import plotly.graph_objects as go
+    tempo_histogram = histograms.histogram_for(df, 'song_tempo', bins=30)
+    fig = go.Figure(tempo_histogram.plotly_trace(marker_color='#3366CC', name='song_tempo'))
+    fig.update_layout(title='Distribution of Song Tempos (BPM)')
     
     # Add tempo categories annotation
     fig.add_annotation(
@@ -182,66 +204,145 @@ def create_tempo_histogram(df):
     
     return fig
 
-def plot_loudness_vs_popularity(df):
+# Above this many points the loudness/popularity scatter is downsampled or binned
+SCATTER_POINT_THRESHOLD = 20000
+
+@instrumentation.instrument
+def linear_fit_sums(x, y):
+    """
+    Sufficient statistics for an ordinary least-squares line.
+    
+    Sums from different chunks can be added together before calling fit_line_from_sums.
+    
+    Args:
+        x (array-like): Predictor values
+        y (array-like): Response values
+        
+    Returns:
+        numpy.ndarray: [n, sum(x), sum(y), sum(x*x), sum(x*y)]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    return np.array([len(x), x.sum(), y.sum(), (x * x).sum(), (x * y).sum()])
+
+@instrumentation.instrument
+def fit_line_from_sums(sums):
+    """
+    Closed-form OLS slope and intercept from linear_fit_sums output.
+    
+    Args:
+        sums (numpy.ndarray): [n, sum(x), sum(y), sum(x*x), sum(x*y)]
+        
+    Returns:
+        tuple: (slope, intercept), or (nan, nan) if x has no spread
+    """
+    n, sx, sy, sxx, sxy = sums
+    denominator = n * sxx - sx * sx
+    if n < 2 or denominator == 0:
+        return np.nan, np.nan
+    slope = (n * sxy - sx * sy) / denominator
+    return slope, (sy - slope * sx) / n
+
+def _stratified_sample(x, size, strata=20, seed=0):
+    """Positions of a sample of x spread proportionally over equal-width strata of x."""
+    rng = np.random.default_rng(seed)
+    edges = np.linspace(x.min(), x.max(), strata + 1)
+    stratum = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, strata - 1)
+    fraction = size / len(x)
+    picked = []
+    for s in range(strata):
+        members = np.flatnonzero(stratum == s)
+        take = int(round(len(members) * fraction))
+        if take:
+            picked.append(rng.choice(members, size=min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(picked)) if picked else np.empty(0, dtype=np.int64)
+
+@instrumentation.instrument
+def plot_loudness_vs_popularity(df, max_points=SCATTER_POINT_THRESHOLD, large_mode='sample'):
     """
     Create a scatter plot showing the relationship between song loudness and popularity.
     
+    The trend line is fitted with closed-form least-squares sums over every row. Above
+    max_points rows the figure shows either a stratified sample of the points or a 2D
+    density heatmap, so the figure size does not grow with the data.
+    
     Args:
         df (pandas.DataFrame): The music dataframe with song_loudness and song_hotttnesss columns
+        max_points (int, optional): Largest number of raw points to embed. Defaults to SCATTER_POINT_THRESHOLD.
+        large_mode (str, optional): 'sample' or 'density' for inputs above max_points. Defaults to 'sample'.
         
     Returns:
         fig: A plotly figure object
     """
     if 'song_loudness' not in df.columns or 'song_hotttnesss' not in df.columns:
-        st.error("Required columns for loudness vs popularity visualization are missing!")
+        _show_error("Required columns for loudness vs popularity visualization are missing!")
         return None
     
-    # Create a scatter plot
-    fig = px.scatter(
-        df,
-        x='song_loudness',
-        y='song_hotttnesss',
-        title='Relationship Between Song Loudness and Popularity',
-        labels={
-            'song_loudness': 'Loudness (dB)',
-            'song_hotttnesss': 'Popularity Score'
-        },
-        opacity=0.7,
-        color_discrete_sequence=['#FF5733']
-    )
+    points = df[['song_loudness', 'song_hotttnesss']].dropna()
+    x = points['song_loudness'].to_numpy(dtype=np.float64)
+    y = points['song_hotttnesss'].to_numpy(dtype=np.float64)
+    labels = {
+        'song_loudness': 'Loudness (dB)',
+        'song_hotttnesss': 'Popularity Score'
+    }
+    title = 'Relationship Between Song Loudness and Popularity'
+    
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    if len(points) > max_points and large_mode == 'density':
+        # Bin the points server-side and send only the bin counts
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=60)
+        fig = go.Figure(go.Heatmap(
+            x=(x_edges[:-1] + x_edges[1:]) / 2,
+            y=(y_edges[:-1] + y_edges[1:]) / 2,
+            z=counts.T,
+            colorscale='Viridis',
+            colorbar=dict(title='Songs')
+        ))
+        fig.update_layout(title=title)
+    else:
+        if len(points) > max_points:
+            points = points.iloc[_stratified_sample(x, max_points)]
+        
+        # Create the scatter plot once
+        fig = px.scatter(
+            points,
+            x='song_loudness',
+            y='song_hotttnesss',
+            title=title,
+            labels=labels,
+            opacity=0.7
+        )
     
-    # Add trendline
-    fig.update_traces(marker=dict(size=8))
+    # Add a trend line fitted over every row, not just the plotted ones
+    slope, intercept = fit_line_from_sums(linear_fit_sums(x, y))
+    if not np.isnan(slope):
+        line_x = np.array([x.min(), x.max()])
+        fig.add_trace(go.Scatter(x=line_x, y=slope * line_x + intercept, mode='lines', name='OLS trend'))
     
-    # Add a trend line
     fig.update_layout(
         xaxis_title="Loudness (dB)",
         yaxis_title="Popularity Score",
         showlegend=False
     )
     
-    # Add a trend line using plotly's built-in functionality
-    fig = px.scatter(
-        df,
-        x='song_loudness',
-        y='song_hotttnesss',
-        trendline='ols',
-        title='Relationship Between Song Loudness and Popularity',
-        labels={
-            'song_loudness': 'Loudness (dB)',
-            'song_hotttnesss': 'Popularity Score'
-        },
-        opacity=0.7
-    )
-    
     return fig
 
-def create_artist_location_map(df):
+# Above this many points the location maps render pre-binned grid cells instead
+MAP_POINT_THRESHOLD = 20000
+
+@instrumentation.instrument
+def create_artist_location_map(df, max_points=MAP_POINT_THRESHOLD, cell_degrees=2.0):
     """
     Create a map visualization of artist locations.
     
     Args:
         df (pandas.DataFrame): The music dataframe with artist location data
+        max_points (int, optional): Above this many located artists, render one marker per
+            lat/lon grid cell (sized by artist count, coloured by mean popularity) instead of
+            one per artist. Defaults to MAP_POINT_THRESHOLD.
+        cell_degrees (float, optional): Grid cell size in degrees for the binned map. Defaults to 2.0.
         
     Returns:
         fig: A plotly figure object
@@ -250,25 +351,45 @@ def create_artist_location_map(df):
     map_df = df.dropna(subset=['artist_latitude', 'artist_longitude'])
     
     if len(map_df) == 0:
-        st.error("No valid location data found for mapping!")
+        _show_error("No valid location data found for mapping!")
         return None
     
-    # Add popularity for size reference
-    map_df['size'] = map_df['artist_hotttnesss'].fillna(0) * 50 + 10
-    
-    # Create the map
-    fig = px.scatter_geo(
-        map_df,
-        lat='artist_latitude',
-        lon='artist_longitude',
-        hover_name='artist_name',
-        size='size',
-        color='artist_hotttnesss',
-        color_continuous_scale=px.colors.sequential.Viridis,
-        projection='natural earth',
-        title='Global Distribution of Artists by Popularity',
-        labels={'artist_hotttnesss': 'Artist Popularity'}
-    )
+    import plotly.express as px
+    
+    if len(map_df) > max_points:
+        # Pre-bin the points so the figure size stays flat as the dataset grows
+        cells = artist_geography.grid_density(map_df['artist_latitude'], map_df['artist_longitude'],
+                                              map_df['artist_hotttnesss'], cell_degrees)
+        cells['size'] = np.sqrt(cells['count'])
+        fig = px.scatter_geo(
+            cells,
+            lat='latitude',
+            lon='longitude',
+            size='size',
+            color='mean',
+            hover_data={'count': True, 'size': False},
+            color_continuous_scale=px.colors.sequential.Viridis,
+            projection='natural earth',
+            title='Global Distribution of Artists by Popularity',
+            labels={'mean': 'Mean Artist Popularity', 'count': 'Artists'}
+        )
+    else:
+        # Add popularity for size reference
+        map_df = map_df.assign(size=map_df['artist_hotttnesss'].fillna(0) * 50 + 10)
+        
+        # Create the map
+        fig = px.scatter_geo(
+            map_df,
+            lat='artist_latitude',
+            lon='artist_longitude',
+            hover_name='artist_name',
+            size='size',
+            color='artist_hotttnesss',
+            color_continuous_scale=px.colors.sequential.Viridis,
+            projection='natural earth',
+            title='Global Distribution of Artists by Popularity',
+            labels={'artist_hotttnesss': 'Artist Popularity'}
+        )
     
     # Update layout
     fig.update_layout(
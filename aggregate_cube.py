@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+import frame_cache
+
+# Statistics kept per group and column; all of them can be merged across batches
+CUBE_STATS = ['count', 'sum', 'sumsq', 'min', 'max']
+
+class AggregateCube:
+    """
+    Per-year and per-decade aggregates for every numeric song_*/artist_* column.
+
+    The base level is grouped by (decade, year) in a single scan; the 'year' and
+    'decade' levels are rolled up from it, and means, variances and trends are all
+    served from the stored count/sum/sum-of-squares/min/max. New records can be
+    folded in with update() without rescanning old data.
+    """
+
+    def __init__(self, base=None):
+        """
+        Args:
+            base (dict, optional): A DataFrame per statistic in CUBE_STATS, indexed by
+                (decade, year) with one column per value column
+        """
+        self.base = base
+        self._levels = {}
+
+    @staticmethod
+    def _value_columns(df):
+        return [col for col in df.select_dtypes(include='number').columns
+                if col.startswith('song_') or col.startswith('artist_')]
+
+    @staticmethod
+    def _scan(df):
+        """Aggregate one frame into base-level statistics."""
+        if 'song_year' in df.columns:
+            year = df['song_year']
+            decade = df['decade'] if 'decade' in df.columns else (year // 10) * 10
+        elif 'decade' in df.columns:
+            decade = df['decade']
+            year = pd.Series(np.nan, index=df.index)
+        else:
+            raise ValueError("AggregateCube needs a 'song_year' or 'decade' column")
+
+        values = df[AggregateCube._value_columns(df)].astype(np.float64)
+        keys = [decade.rename('decade'), year.rename('year')]
+        grouped = values.groupby(keys, dropna=False)
+        base = {
+            'count': grouped.count(),
+            'sum': grouped.sum(),
+            'sumsq': (values ** 2).groupby(keys, dropna=False).sum(),
+            'min': grouped.min(),
+            'max': grouped.max(),
+        }
+        # Rows without a decade are left out, as groupby('decade') would do
+        return {stat: frame[frame.index.get_level_values('decade').notna()] for stat, frame in base.items()}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build a cube from a prepared dataframe.
+
+        Args:
+            df (pandas.DataFrame): The prepared music dataframe
+
+        Returns:
+            AggregateCube: The aggregates of df
+        """
+        return cls(cls._scan(df))
+
+    def update(self, df):
+        """
+        Fold new records into the cube.
+
+        Args:
+            df (pandas.DataFrame): New prepared records with the same columns
+        """
+        self.merge(AggregateCube(self._scan(df)))
+
+    def merge(self, other):
+        """
+        Fold another cube (e.g. one built over a different row shard) into this one.
+
+        Args:
+            other (AggregateCube): Aggregates of other records
+        """
+        if other.base is None:
+            return
+        if self.base is None:
+            self.base = other.base
+        else:
+            merged = {}
+            for stat in ('count', 'sum', 'sumsq'):
+                merged[stat] = self.base[stat].add(other.base[stat], fill_value=0)
+            merged['min'] = self.base['min'].combine(other.base['min'], np.fmin)
+            merged['max'] = self.base['max'].combine(other.base['max'], np.fmax)
+            self.base = merged
+        self._levels = {}
+
+    def stat(self, name, level='decade'):
+        """
+        Get one statistic rolled up to a level.
+
+        Args:
+            name (str): One of CUBE_STATS
+            level (str, optional): 'decade' or 'year'. Defaults to 'decade'.
+
+        Returns:
+            pandas.DataFrame: The statistic indexed by the level, one column per value column
+        """
+        if level not in self._levels:
+            grouped = {stat: frame.groupby(level=level) for stat, frame in self.base.items()}
+            self._levels[level] = {
+                'count': grouped['count'].sum(),
+                'sum': grouped['sum'].sum(),
+                'sumsq': grouped['sumsq'].sum(),
+                'min': grouped['min'].min(),
+                'max': grouped['max'].max(),
+            }
+        return self._levels[level][name]
+
+    def count(self, level='decade'):
+        """Non-missing values per group and column."""
+        return self.stat('count', level)
+
+    def mean(self, level='decade'):
+        """Mean per group and column."""
+        count = self.stat('count', level)
+        return self.stat('sum', level) / count.where(count > 0)
+
+    def var(self, level='decade'):
+        """Sample variance per group and column (ddof=1, like pandas)."""
+        count = self.stat('count', level)
+        total = self.stat('sum', level)
+        variance = (self.stat('sumsq', level) - total ** 2 / count.where(count > 0)) / (count - 1).where(count > 1)
+        return variance.clip(lower=0)
+
+    def trend(self, column, level='decade'):
+        """
+        Least-squares slope of a column's group means over the level.
+
+        Args:
+            column (str): Value column such as 'song_tempo'
+            level (str, optional): 'decade' or 'year'. Defaults to 'decade'.
+
+        Returns:
+            float: Change in the mean per unit of the level (NaN with fewer than two groups)
+        """
+        means = self.mean(level)[column].dropna()
+        if len(means) < 2:
+            return np.nan
+        return float(np.polyfit(means.index.to_numpy(dtype=np.float64), means.to_numpy(), 1)[0])
+
+# Cubes built by cube_for, keyed by the content of the columns they aggregate
+_CUBES = frame_cache.FrameCache()
+
+def cube_for(df):
+    """
+    Get the aggregate cube of a frame, building it on first use.
+
+    The cube is cached by the content of the columns it aggregates, so the decade
+    insights and decade plots of one prepared frame share a single scan, and edits
+    to the frame build a new cube.
+
+    Args:
+        df (pandas.DataFrame): The prepared music dataframe
+
+    Returns:
+        AggregateCube: The cube of df
+    """
+    columns = ['song_year', 'decade'] + AggregateCube._value_columns(df)
+    return _CUBES.get_or_build(df, columns, lambda: AggregateCube.from_frame(df))
@@ -1,13 +1,18 @@
 import pandas as pd
 import numpy as np
-import streamlit as st
+import aggregate_cube
+import artist_geography
+import instrumentation
 
-def get_decade_insights(df):
+@instrumentation.instrument
+def get_decade_insights(df, cube=None):
     """
     Generate insights about music trends across decades.
     
     Args:
         df (pandas.DataFrame): The prepared music dataframe
+        cube (aggregate_cube.AggregateCube, optional): Precomputed aggregates of df.
+            If None, the cube shared through aggregate_cube.cube_for is used.
         
     Returns:
         str: Text with insights about decade trends
@@ -15,16 +20,18 @@ def get_decade_insights(df):
     if 'decade' not in df.columns:
         return "Decade analysis not available - missing required data."
     
-    # Group by decade
-    decade_stats = df.groupby('decade').agg({
-        'song_hotttnesss': ['mean', 'count'],
-        'song_tempo': 'mean',
-        'song_loudness': 'mean',
-        'song_duration': 'mean'
-    }).reset_index()
-    
-    # Flatten the multi-index
-    decade_stats.columns = ['_'.join(col).strip('_') for col in decade_stats.columns.values]
+    # Read the per-decade statistics from the aggregate cube
+    if cube is None:
+        cube = aggregate_cube.cube_for(df)
+    means = cube.mean('decade')
+    decade_stats = pd.DataFrame({
+        'decade': means.index,
+        'song_hotttnesss_mean': means['song_hotttnesss'].to_numpy(),
+        'song_hotttnesss_count': cube.count('decade')['song_hotttnesss'].to_numpy(),
+        'song_tempo_mean': means['song_tempo'].to_numpy(),
+        'song_loudness_mean': means['song_loudness'].to_numpy(),
+        'song_duration_mean': means['song_duration'].to_numpy()
+    })
     
     # Find the most popular decade
     most_popular_decade = decade_stats.loc[decade_stats['song_hotttnesss_mean'].idxmax()]['decade']
@@ -51,41 +58,96 @@ def get_decade_insights(df):
     
     return insights
 
-def get_musical_attributes_insights(df):
+# Map numeric keys to musical notation
+KEY_MAPPING = {
+    0: 'C', 1: 'C#', 2: 'D', 3: 'D#', 4: 'E', 5: 'F',
+    6: 'F#', 7: 'G', 8: 'G#', 9: 'A', 10: 'A#', 11: 'B'
+}
+
+@instrumentation.instrument
+def musical_attributes_partials(df):
     """
-    Generate insights about musical attributes like key, tempo, and loudness.
+    Compute mergeable partial aggregates for get_musical_attributes_insights.
     
     Args:
-        df (pandas.DataFrame): The prepared music dataframe
+        df (pandas.DataFrame): The prepared music dataframe (or a row shard of it)
         
     Returns:
-        str: Text with insights about musical attributes
+        dict: Key counts, tempo sums and category counts, row count and the
+            co-moments of loudness and popularity
     """
-    # Create key mapping for reference
-    key_mapping = {
-        0: 'C', 1: 'C#', 2: 'D', 3: 'D#', 4: 'E', 5: 'F',
-        6: 'F#', 7: 'G', 8: 'G#', 9: 'A', 10: 'A#', 11: 'B'
+    tempo = df['song_tempo']
+    partials = {
+        'key_counts': df['song_key'].value_counts(),
+        'n_rows': len(df),
+        'tempo_sum': float(tempo.sum()),
+        'tempo_count': int(tempo.count()),
+        'slow': int((tempo < 90).sum()),
+        'medium': int(((tempo >= 90) & (tempo < 150)).sum()),
+        'fast': int((tempo >= 150).sum()),
+        'moments': None
     }
     
-    # Check if required columns exist
-    if 'song_key' not in df.columns or 'song_tempo' not in df.columns:
-        return "Musical attributes analysis not available - missing required data."
+    # Sums needed for the loudness/popularity correlation over rows where both are present
+    if 'song_loudness' in df.columns and 'song_hotttnesss' in df.columns:
+        both = df[['song_loudness', 'song_hotttnesss']].dropna()
+        x = both['song_loudness'].to_numpy(dtype=np.float64)
+        y = both['song_hotttnesss'].to_numpy(dtype=np.float64)
+        partials['moments'] = np.array([len(x), x.sum(), y.sum(), (x * x).sum(), (y * y).sum(), (x * y).sum()])
+    
+    return partials
+
+@instrumentation.instrument
+def merge_musical_attributes_partials(parts):
+    """
+    Combine partial aggregates from several row shards.
+    
+    Args:
+        parts (list): Results of musical_attributes_partials
+        
+    Returns:
+        dict: The partial aggregates of all shards together
+    """
+    merged = dict(parts[0])
+    for part in parts[1:]:
+        merged['key_counts'] = merged['key_counts'].add(part['key_counts'], fill_value=0)
+        for name in ('n_rows', 'tempo_sum', 'tempo_count', 'slow', 'medium', 'fast'):
+            merged[name] += part[name]
+        if merged['moments'] is not None and part['moments'] is not None:
+            merged['moments'] = merged['moments'] + part['moments']
+    merged['key_counts'] = merged['key_counts'].sort_values(ascending=False, kind='stable')
+    return merged
+
+@instrumentation.instrument
+def format_musical_attributes_insights(partials):
+    """
+    Turn (merged) partial aggregates into the musical attributes insight text.
+    
+    Args:
+        partials (dict): Result of musical_attributes_partials or merge_musical_attributes_partials
+        
+    Returns:
+        str: Text with insights about musical attributes
+    """
+    key_counts = partials['key_counts']
     
     # Find most common key
-    most_common_key = df['song_key'].value_counts().idxmax()
-    most_common_key_name = key_mapping.get(most_common_key, 'Unknown')
+    most_common_key = key_counts.idxmax()
+    most_common_key_name = KEY_MAPPING.get(most_common_key, 'Unknown')
     
     # Calculate average tempo
-    avg_tempo = df['song_tempo'].mean()
+    avg_tempo = partials['tempo_sum'] / partials['tempo_count'] if partials['tempo_count'] else np.nan
     
     # Categorize songs by tempo
-    slow_songs = (df['song_tempo'] < 90).sum()
-    medium_songs = ((df['song_tempo'] >= 90) & (df['song_tempo'] < 150)).sum()
-    fast_songs = (df['song_tempo'] >= 150).sum()
+    slow_songs = partials['slow']
+    medium_songs = partials['medium']
+    fast_songs = partials['fast']
     
     # Find correlation between loudness and popularity
-    if 'song_loudness' in df.columns and 'song_hotttnesss' in df.columns:
-        loudness_popularity_corr = df['song_loudness'].corr(df['song_hotttnesss'])
+    if partials['moments'] is not None:
+        n, sx, sy, sxx, syy, sxy = partials['moments']
+        denominator = np.sqrt((n * sxx - sx * sx) * (n * syy - sy * sy))
+        loudness_popularity_corr = float((n * sxy - sx * sy) / denominator) if n > 1 and denominator > 0 else np.nan
     else:
         loudness_popularity_corr = "Not available"
     
@@ -93,7 +155,7 @@ def get_musical_attributes_insights(df):
     insights = f"""
     ## Musical Attributes Insights
     
-    - The most common musical key is {most_common_key_name} (representing {df['song_key'].value_counts().iloc[0]/len(df)*100:.1f}% of songs).
+    - The most common musical key is {most_common_key_name} (representing {key_counts.max()/partials['n_rows']*100:.1f}% of songs).
     - The average tempo across all songs is {avg_tempo:.1f} BPM (beats per minute).
     - Tempo distribution: {slow_songs} slow songs (<90 BPM), {medium_songs} medium songs (90-150 BPM), and {fast_songs} fast songs (>150 BPM).
     - The correlation between song loudness and popularity is {loudness_popularity_corr if isinstance(loudness_popularity_corr, str) else loudness_popularity_corr:.2f}, which suggests that {'louder songs tend to be more popular' if isinstance(loudness_popularity_corr, float) and loudness_popularity_corr > 0.1 else 'there is no strong relationship between loudness and popularity'}.
@@ -101,41 +163,93 @@ def get_musical_attributes_insights(df):
     
     return insights
 
-def get_artist_insights(df):
+@instrumentation.instrument
+def get_musical_attributes_insights(df):
     """
-    Generate insights about artists in the dataset.
+    Generate insights about musical attributes like key, tempo, and loudness.
     
     Args:
         df (pandas.DataFrame): The prepared music dataframe
         
     Returns:
-        str: Text with insights about artists
+        str: Text with insights about musical attributes
     """
     # Check if required columns exist
-    if 'artist_name' not in df.columns or 'artist_hotttnesss' not in df.columns:
-        return "Artist analysis not available - missing required data."
+    if 'song_key' not in df.columns or 'song_tempo' not in df.columns:
+        return "Musical attributes analysis not available - missing required data."
+    
+    return format_musical_attributes_insights(musical_attributes_partials(df))
+
+@instrumentation.instrument
+def artist_partials(df):
+    """
+    Compute mergeable partial aggregates for get_artist_insights.
+    
+    Regions are assigned with artist_geography without adding a column to df.
+    
+    Args:
+        df (pandas.DataFrame): The prepared music dataframe (or a row shard of it)
         
+    Returns:
+        dict: Distinct artist names, the top 5 rows by artist popularity and, when
+            location data is available, located artist names and region counts
+    """
+    summary = artist_geography.artist_summary(df)
+    partials = {
+        'artists': set(summary.index),
+        'top': artist_geography.top_artists(df, 5),
+        'located_artists': None,
+        'region_counts': None
+    }
+    
+    # Analyze geographic distribution if location data is available
+    if 'artist_latitude' in df.columns and 'artist_longitude' in df.columns:
+        partials['located_artists'] = set(summary.index[summary['located']])
+        partials['region_counts'] = artist_geography.region_counts(df)
+    
+    return partials
+
+@instrumentation.instrument
+def merge_artist_partials(parts):
+    """
+    Combine partial aggregates from several row shards.
+    
+    Args:
+        parts (list): Results of artist_partials
+        
+    Returns:
+        dict: The partial aggregates of all shards together
+    """
+    merged = dict(parts[0])
+    merged['artists'] = set().union(*(part['artists'] for part in parts))
+    merged['top'] = artist_geography.top_artists(pd.concat([part['top'] for part in parts]), 5)
+    if all(part['located_artists'] is not None for part in parts):
+        merged['located_artists'] = set().union(*(part['located_artists'] for part in parts))
+        merged['region_counts'] = pd.concat([part['region_counts'] for part in parts]).groupby(level=0, observed=True).sum()
+    return merged
+
+@instrumentation.instrument
+def format_artist_insights(partials):
+    """
+    Turn (merged) partial aggregates into the artist insight text.
+    
+    Args:
+        partials (dict): Result of artist_partials or merge_artist_partials
+        
+    Returns:
+        str: Text with insights about artists
+    """
     # Count unique artists
-    unique_artists = df['artist_name'].nunique()
+    unique_artists = len(partials['artists'])
     
     # Find top artists by popularity
-    top_artists = df.sort_values('artist_hotttnesss', ascending=False).head(5)['artist_name'].tolist()
+    top_artists = partials['top']['artist_name'].tolist()
     
-    # Analyze geographic distribution if location data is available
-    has_location_data = 'artist_latitude' in df.columns and 'artist_longitude' in df.columns
     location_insights = ""
     
-    if has_location_data:
-        # Count artists with location data
-        artists_with_location = df.dropna(subset=['artist_latitude', 'artist_longitude'])['artist_name'].nunique()
-        
-        # Group by rough geographic region
-        df['region'] = 'Unknown'
-        df.loc[df['artist_longitude'] < -30, 'region'] = 'Americas'
-        df.loc[(df['artist_longitude'] >= -30) & (df['artist_longitude'] < 60), 'region'] = 'Europe/Africa'
-        df.loc[df['artist_longitude'] >= 60, 'region'] = 'Asia/Pacific'
-        
-        region_counts = df['region'].value_counts()
+    if partials['located_artists'] is not None:
+        artists_with_location = len(partials['located_artists'])
+        region_counts = partials['region_counts']
         
         location_insights = f"""
         - {artists_with_location} out of {unique_artists} artists have geographical location data.
@@ -152,3 +266,20 @@ def get_artist_insights(df):
     """
     
     return insights
+
+@instrumentation.instrument
+def get_artist_insights(df):
+    """
+    Generate insights about artists in the dataset.
+    
+    Args:
+        df (pandas.DataFrame): The prepared music dataframe
+        
+    Returns:
+        str: Text with insights about artists
+    """
+    # Check if required columns exist
+    if 'artist_name' not in df.columns or 'artist_hotttnesss' not in df.columns:
+        return "Artist analysis not available - missing required data."
+    
+    return format_artist_insights(artist_partials(df))
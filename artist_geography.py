@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+
+import frame_cache
+
+# Longitude boundaries between the rough geographic regions, and their names
+REGION_EDGES = [-30, 60]
+REGION_NAMES = ['Americas', 'Europe/Africa', 'Asia/Pacific']
+UNKNOWN_REGION = 'Unknown'
+
+def assign_regions(longitude, edges=None, names=None):
+    """
+    Bin longitudes into regions with one vectorized np.digitize call.
+
+    A longitude below edges[0] falls in names[0], one in [edges[i - 1], edges[i]) in
+    names[i], and one at or above edges[-1] in names[-1]. Missing longitudes get
+    UNKNOWN_REGION.
+
+    Args:
+        longitude (array-like): Artist longitudes
+        edges (list, optional): Increasing region boundaries. Defaults to REGION_EDGES.
+        names (list, optional): One name per region (len(edges) + 1). Defaults to REGION_NAMES.
+
+    Returns:
+        pandas.Categorical: The region of every longitude
+    """
+    edges = REGION_EDGES if edges is None else edges
+    names = REGION_NAMES if names is None else names
+    if len(names) != len(edges) + 1:
+        raise ValueError("Need exactly one more region name than region edges")
+
+    longitude = np.asarray(longitude, dtype=np.float64)
+    codes = np.digitize(longitude, edges)
+    codes[np.isnan(longitude)] = len(names)
+    return pd.Categorical.from_codes(codes, categories=list(names) + [UNKNOWN_REGION])
+
+def region_counts(df, edges=None, names=None):
+    """
+    Count rows per region without adding a column to df.
+
+    Args:
+        df (pandas.DataFrame): Music dataframe with an artist_longitude column
+        edges (list, optional): Region boundaries. Defaults to REGION_EDGES.
+        names (list, optional): Region names. Defaults to REGION_NAMES.
+
+    Returns:
+        pandas.Series: Row count per region (including regions with no rows)
+    """
+    return pd.Series(assign_regions(df['artist_longitude'], edges, names)).value_counts(sort=False)
+
+def top_artists(df, k=5):
+    """
+    Get the k rows with the highest artist popularity using a partial selection.
+
+    Args:
+        df (pandas.DataFrame): Music dataframe with artist_name and artist_hotttnesss columns
+        k (int, optional): Number of rows. Defaults to 5.
+
+    Returns:
+        pandas.DataFrame: artist_hotttnesss and artist_name of the top k rows, most popular first
+    """
+    return df.nlargest(k, 'artist_hotttnesss')[['artist_hotttnesss', 'artist_name']]
+
+# Per-artist summaries built by artist_summary, keyed by the content of their columns
+_SUMMARIES = frame_cache.FrameCache()
+
+def artist_summary(df):
+    """
+    Per-artist aggregates, computed once per frame content and reused on later calls.
+
+    Args:
+        df (pandas.DataFrame): Music dataframe with artist_name and artist_hotttnesss columns
+
+    Returns:
+        pandas.DataFrame: One row per artist with song count, mean and max popularity,
+            and whether any of the artist's songs has location data
+    """
+    columns = ['artist_name', 'artist_hotttnesss', 'artist_latitude', 'artist_longitude']
+    return _SUMMARIES.get_or_build(df, columns, lambda: _build_artist_summary(df))
+
+def _build_artist_summary(df):
+    if 'artist_latitude' in df.columns and 'artist_longitude' in df.columns:
+        located = df['artist_latitude'].notna() & df['artist_longitude'].notna()
+    else:
+        located = pd.Series(False, index=df.index)
+    grouped = pd.DataFrame({
+        'artist_name': df['artist_name'],
+        'artist_hotttnesss': df['artist_hotttnesss'],
+        'located': located
+    }).groupby('artist_name', observed=True)
+    summary = grouped.agg(
+        songs=('artist_hotttnesss', 'size'),
+        mean_hotttnesss=('artist_hotttnesss', 'mean'),
+        max_hotttnesss=('artist_hotttnesss', 'max'),
+        located=('located', 'any')
+    )
+    return summary
+
+def grid_density(latitude, longitude, values=None, cell_degrees=2.0):
+    """
+    Pre-bin coordinates into a lat/lon grid with a count and mean value per cell.
+
+    Args:
+        latitude (array-like): Latitudes in degrees (rows with NaN coordinates are skipped)
+        longitude (array-like): Longitudes in degrees
+        values (array-like, optional): Value to average per cell (e.g. artist popularity)
+        cell_degrees (float, optional): Cell size in degrees. Defaults to 2.0.
+
+    Returns:
+        pandas.DataFrame: One row per non-empty cell with the cell centre ('latitude',
+            'longitude'), 'count' and, if values were given, 'mean' (NaN values ignored)
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    valid = ~np.isnan(latitude) & ~np.isnan(longitude)
+
+    n_rows = int(np.ceil(180 / cell_degrees))
+    n_cols = int(np.ceil(360 / cell_degrees))
+    rows = np.clip(((latitude[valid] + 90) // cell_degrees).astype(np.int64), 0, n_rows - 1)
+    cols = np.clip(((longitude[valid] + 180) // cell_degrees).astype(np.int64), 0, n_cols - 1)
+    cells, inverse = np.unique(rows * n_cols + cols, return_inverse=True)
+
+    density = pd.DataFrame({
+        'latitude': (cells // n_cols) * cell_degrees - 90 + cell_degrees / 2,
+        'longitude': (cells % n_cols) * cell_degrees - 180 + cell_degrees / 2,
+        'count': np.bincount(inverse, minlength=len(cells))
+    })
+    if values is not None:
+        values = np.asarray(values, dtype=np.float64)[valid]
+        present = ~np.isnan(values)
+        sums = np.bincount(inverse[present], weights=values[present], minlength=len(cells))
+        counts = np.bincount(inverse[present], minlength=len(cells))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            density['mean'] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return density
@@ -0,0 +1,153 @@
+import importlib.util
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Render off-screen; must be selected before pyplot is imported by the chart modules
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+import music
+import data_loader
+import data_cleaner
+import figure_cache
+import Visualization
+import main as popularity_report
+import MusicalAttributions
+import ArtistLocationMap
+
+# Plotly needs kaleido to export static images
+_HAS_KALEIDO = importlib.util.find_spec('kaleido') is not None
+
+# Dataset shared with forked workers; set by render_report before the pool starts
+_SHARED = None
+
+def _save_figure(fig, path):
+    """
+    Save a Visualization figure: matplotlib as PNG, Plotly as PNG when kaleido is
+    installed and as Plotly JSON otherwise.
+
+    Returns:
+        str: The path actually written
+    """
+    if not hasattr(fig, 'to_json'):
+        fig.savefig(path)
+        return path
+    if _HAS_KALEIDO:
+        fig.write_image(path)
+        return path
+
+    json_path = os.path.splitext(path)[0] + '.json'
+    with open(json_path, 'w') as f:
+        f.write(figure_cache.serialize_figure(fig)[1])
+    return json_path
+
+def _render_popularity_by_year(store, df, path):
+    popularity_report.plot_popularity_by_year(popularity_report.popularity_by_year(store)[0], path)
+    return path
+
+def _render_key_distribution(store, df, path):
+    popularity_report.plot_key_distribution(popularity_report.key_distribution(store), path)
+    return path
+
+def _render_artist_location_map(store, df, path):
+    ArtistLocationMap.plot_artist_locations(ArtistLocationMap.extract_artist_locations(store), path)
+    return path
+
+def _render_musical_attributes(store, df, path):
+    MusicalAttributions.plot_musical_attributes(MusicalAttributions.extract_musical_attributes(store), path)
+    return path
+
+def _visualization_chart(builder):
+    """Wrap a Visualization builder as a chart renderer."""
+    def render(store, df, path):
+        fig = builder(df)
+        return _save_figure(fig, path) if fig is not None else None
+    return render
+
+# Every static chart: name -> (file name, renderer(store, df, path))
+CHARTS = {
+    'popularity_by_year': ('popularity_by_year.png', _render_popularity_by_year),
+    'key_distribution': ('key_distribution.png', _render_key_distribution),
+    'artist_location_map': ('artist_location_map.png', _render_artist_location_map),
+    'musical_attributes': ('musical_attributes_analysis.png', _render_musical_attributes),
+    'decade_trend': ('decade_trend.png', _visualization_chart(Visualization.plot_decade_trend)),
+    'key_distribution_prepared': ('key_distribution_prepared.png', _visualization_chart(Visualization.plot_key_distribution)),
+    'tempo_histogram': ('tempo_histogram.png', _visualization_chart(Visualization.create_tempo_histogram)),
+    'loudness_vs_popularity': ('loudness_vs_popularity.png', _visualization_chart(Visualization.plot_loudness_vs_popularity)),
+    'artist_location_map_interactive': ('artist_location_map_interactive.png', _visualization_chart(Visualization.create_artist_location_map)),
+}
+
+def _render_chart(job):
+    """Worker entry point: render one chart from the shared dataset and time it."""
+    name, out_dir = job
+    file_name, renderer = CHARTS[name]
+    store, df = _SHARED
+
+    start = time.perf_counter()
+    try:
+        path = renderer(store, df, os.path.join(out_dir, file_name))
+    finally:
+        plt.close('all')
+    return {'chart': name, 'path': path, 'seconds': time.perf_counter() - start}
+
+def render_report(out_dir='.', charts=None, workers=None, store=None, df=None):
+    """
+    Render every static chart to disk in parallel.
+
+    The dataset is loaded and prepared once in the parent; process workers are
+    forked so they read it without pickling, and each renders a subset of the
+    charts with the Agg backend. Without fork support the charts render serially.
+
+    Args:
+        out_dir (str, optional): Directory for the output files. Defaults to '.'.
+        charts (list, optional): Names from CHARTS to render. If None, all of them.
+        workers (int, optional): Number of worker processes. Defaults to the CPU count.
+        store (music.MusicColumns, optional): The dataset. If None, music.get_music().
+        df (pandas.DataFrame, optional): The prepared dataframe. If None, built from
+            store (or the default dataset) with data_cleaner.run_pipeline.
+
+    Returns:
+        list: One dict per chart with 'chart', 'path' (None if the chart was skipped)
+            and 'seconds', in the order of charts
+    """
+    global _SHARED
+
+    if df is None:
+        # Prepare the same records the script charts read, so every chart shows one dataset
+        df = data_cleaner.run_pipeline(data_loader.flatten_music_columns(store) if store is not None else None)
+    if store is None:
+        store = music.get_music()
+    names = list(CHARTS) if charts is None else list(charts)
+    unknown = [name for name in names if name not in CHARTS]
+    if unknown:
+        raise ValueError(f"Unknown charts: {', '.join(unknown)}")
+    os.makedirs(out_dir, exist_ok=True)
+
+    jobs = [(name, out_dir) for name in names]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+
+    _SHARED = (store, df)
+    try:
+        if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            return [_render_chart(job) for job in jobs]
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            return list(executor.map(_render_chart, jobs))
+    finally:
+        _SHARED = None
+
+if __name__ == '__main__':
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+
+    start = time.perf_counter()
+    timings = render_report(out_dir)
+    total = time.perf_counter() - start
+
+    print(f"{'Chart':<34}{'Seconds':>10}  Path")
+    for timing in timings:
+        print(f"{timing['chart']:<34}{timing['seconds']:>10.3f}  {timing['path'] or '(skipped)'}")
+    print(f"Rendered {sum(t['path'] is not None for t in timings)} charts in {total:.2f}s")
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import music
+import data_loader
+import data_cleaner
+
+try:
+    import pyarrow  # noqa: F401
+    _HAS_PARQUET = True
+except ImportError:
+    _HAS_PARQUET = False
+
+# Directory for cached pipeline stages (override with the MUSIC_CACHE_DIR environment variable)
+CACHE_DIR = os.environ.get('MUSIC_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.music_cache'))
+
+# Bump a stage's version whenever its code changes so stale entries are ignored
+STAGE_VERSIONS = {
+    'columns': 2,
+    'flatten': 1,
+    'clean': 1,
+    'prepare': 1,
+}
+
+def fingerprint(stage, params, upstream=None):
+    """
+    Compute the cache key for a pipeline stage.
+
+    Args:
+        stage (str): Name of the stage (a key of STAGE_VERSIONS)
+        params (dict): Parameters that determine the stage output (e.g. seed, n_records)
+        upstream (str, optional): Fingerprint of the stage this one was computed from
+
+    Returns:
+        str: A hex digest identifying the stage output
+    """
+    payload = json.dumps({
+        'stage': stage,
+        'version': STAGE_VERSIONS[stage],
+        'params': params,
+        'upstream': upstream,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:20]
+
+def _entry_path(stage, key, cache_dir, extension):
+    return os.path.join(cache_dir or CACHE_DIR, f'{stage}-{key}.{extension}')
+
+def _atomic_write(path, write):
+    """
+    Write a cache entry through a temporary file so readers never see partial files.
+
+    The cache is only an optimization, so a failed write (read-only or missing
+    directory, full disk, ...) is reported as a warning and otherwise ignored.
+
+    Returns:
+        bool: Whether the entry was written
+    """
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write(tmp_path)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as error:
+        warnings.warn(f"Could not write cache entry {path}: {error}")
+        return False
+    finally:
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except OSError:
+            pass
+
+def _read_entry(path, load):
+    """
+    Load a cache entry, treating a missing, unreadable or corrupt file as a miss.
+
+    Returns:
+        The loaded value, or None on a miss
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return load(path)
+    except Exception as error:
+        warnings.warn(f"Ignoring unreadable cache entry {path}: {error}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def _save_columns(store, path):
+    arrays = {f'col:{name}': column for name, column in store.columns.items()}
+    arrays.update({f'cat:{name}': values.astype(str) for name, values in store.categories.items()})
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+def _load_columns(path):
+    columns = {}
+    categories = {}
+    with np.load(path) as npz:
+        for name in npz.files:
+            kind, column = name.split(':', 1)
+            if kind == 'col':
+                columns[column] = npz[name]
+            else:
+                categories[column] = npz[name].astype(object)
+    return music.MusicColumns(columns, categories)
+
+def _save_frame(df, path):
+    if _HAS_PARQUET:
+        df.to_parquet(path)
+    else:
+        df.to_pickle(path)
+
+def _load_frame(path):
+    if _HAS_PARQUET:
+        return pd.read_parquet(path)
+    return pd.read_pickle(path)
+
+def cached_frame(stage, key, build, cache_dir=None):
+    """
+    Load a DataFrame stage from the cache, building and storing it on a miss.
+
+    Unreadable entries count as misses, and failing to store the result only warns.
+
+    Args:
+        stage (str): Name of the stage
+        key (str): Fingerprint of the stage output
+        build (callable): Zero-argument function producing the DataFrame
+        cache_dir (str, optional): Cache directory. Defaults to CACHE_DIR.
+
+    Returns:
+        pandas.DataFrame: The stage output
+    """
+    path = _entry_path(stage, key, cache_dir, 'parquet' if _HAS_PARQUET else 'pkl')
+    df = _read_entry(path, _load_frame)
+    if df is not None:
+        return df
+
+    df = build()
+    _atomic_write(path, lambda tmp_path: _save_frame(df, tmp_path))
+    return df
+
+def load_music_columns(n_records=music.DEFAULT_N_RECORDS, seed=music.DEFAULT_SEED, cache_dir=None, workers=None):
+    """
+    Load the generated columnar dataset from the cache, generating it on a miss.
+
+    Unreadable entries count as misses, and failing to store the result only warns.
+
+    Args:
+        n_records (int, optional): Number of records to generate
+        seed (int, optional): Seed for the generator
+        cache_dir (str, optional): Cache directory. Defaults to CACHE_DIR.
+        workers (int, optional): Worker processes for generating large datasets.
+            Defaults to the CPU count.
+
+    Returns:
+        music.MusicColumns: The columnar music dataset
+    """
+    key = fingerprint('columns', {'n_records': n_records, 'seed': seed})
+    path = _entry_path('columns', key, cache_dir, 'npz')
+    store = _read_entry(path, _load_columns)
+    if store is not None:
+        return store
+
+    store = music.generate_music_columns(n_records, seed, workers)
+    _atomic_write(path, lambda tmp_path: _save_columns(store, tmp_path))
+    return store
+
+def _ingested_digest(store, n_records):
+    """Hash of the records appended to a generated store after its first n_records."""
+    digest = hashlib.sha1(str(len(store)).encode())
+    for name in sorted(store.columns):
+        digest.update(name.encode())
+        values = store.columns[name][n_records:]
+        if name in store.categories:
+            values = store.categories[name][values]
+        digest.update(pd.util.hash_array(values).tobytes())
+    return digest.hexdigest()
+
+def load_prepared_music_data(n_records=music.DEFAULT_N_RECORDS, seed=music.DEFAULT_SEED, cache_dir=None):
+    """
+    Run load → flatten → clean → prepare, reusing any stage already cached on disk.
+
+    Each stage is keyed by the generator parameters, its own version and the key
+    of the stage before it, so a change anywhere upstream invalidates it. Records
+    added with music.ingest are included and key the stages too.
+
+    Args:
+        n_records (int, optional): Number of records to generate
+        seed (int, optional): Seed for the generator
+        cache_dir (str, optional): Cache directory. Defaults to CACHE_DIR.
+
+    Returns:
+        pandas.DataFrame: The prepared music dataframe
+    """
+    params = {'n_records': n_records, 'seed': seed}
+
+    # Records ingested into the in-memory dataset are part of its input; they only
+    # exist in this process, so their content (not just their count) goes into the key
+    load_columns = lambda: load_music_columns(n_records, seed, cache_dir)
+    dataset_key = (n_records, seed)
+    if dataset_key in music.DATASET_CACHE:
+        store = music.DATASET_CACHE.get_or_load(dataset_key, load_columns).snapshot()
+        if len(store) != n_records:
+            params['ingested'] = _ingested_digest(store, n_records)
+            load_columns = lambda: store
+
+    flat_key = fingerprint('flatten', params, fingerprint('columns', params))
+    clean_key = fingerprint('clean', params, flat_key)
+    prepare_key = fingerprint('prepare', params, clean_key)
+
+    # Each build only runs on a miss, and only then pulls in the stage before it
+    def build_flat():
+        return data_loader.flatten_music_columns(load_columns())
+
+    def build_clean():
+        return data_cleaner.clean_music_data(cached_frame('flatten', flat_key, build_flat, cache_dir))
+
+    def build_prepared():
+        return data_cleaner.prepare_data_for_analysis(cached_frame('clean', clean_key, build_clean, cache_dir))
+
+    return cached_frame('prepare', prepare_key, build_prepared, cache_dir)
+
+def clear_cache(cache_dir=None):
+    """
+    Remove every cached stage.
+
+    Args:
+        cache_dir (str, optional): Cache directory. Defaults to CACHE_DIR.
+    """
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
@@ -1,33 +1,46 @@
 import pandas as pd
 import numpy as np
+import quantile_sketch
+import instrumentation
 
-def clean_music_data(df):
+@instrumentation.instrument
+def clean_music_data(df, quantile_method='exact', inplace=False):
     """
     Clean the music dataset by handling missing values, outliers, and type conversions.
     
     Args:
         df (pandas.DataFrame): The original music dataframe
+        quantile_method (str, optional): 'exact' to compute medians with pandas, or 'sketch'
+            to estimate every column's median in one pass with quantile_sketch (see
+            QuantileSketch for error bounds). Defaults to 'exact'.
+        inplace (bool, optional): Fill values in df itself instead of a copy. Defaults to False.
         
     Returns:
-        pandas.DataFrame: Cleaned dataframe
+        pandas.DataFrame: Cleaned dataframe (df itself if inplace is True)
     """
     # Make a copy to avoid modifying the original
-    cleaned_df = df.copy()
+    cleaned_df = df if inplace else df.copy()
     
     # Fill missing values for numeric columns with median or 0
     numeric_cols = cleaned_df.select_dtypes(include=['float64', 'int64']).columns
+    if quantile_method == 'sketch':
+        sketched = quantile_sketch.column_quartiles(cleaned_df, numeric_cols)
+        medians = {col: quartiles[1] for col, quartiles in sketched.items()}
+    else:
+        medians = None
     for col in numeric_cols:
         # Fill with median for most numeric features
         if col.endswith('_year'):
             # For year, use a more meaningful value like the median
-            median_year = cleaned_df[col].median()
+            median_year = medians[col] if medians is not None else cleaned_df[col].median()
             cleaned_df[col] = cleaned_df[col].fillna(median_year)
         else:
             # For other numeric values, fill with 0 or median depending on the context
             if 'hotttnesss' in col or 'familiarity' in col:
                 cleaned_df[col] = cleaned_df[col].fillna(0)
             else:
-                cleaned_df[col] = cleaned_df[col].fillna(cleaned_df[col].median())
+                median = medians[col] if medians is not None else cleaned_df[col].median()
+                cleaned_df[col] = cleaned_df[col].fillna(median)
     
     # Fill missing text data with 'Unknown' or appropriate placeholder
     text_cols = cleaned_df.select_dtypes(include=['object']).columns
@@ -36,7 +49,9 @@ def clean_music_data(df):
     
     return cleaned_df
 
-def handle_outliers(df, columns=None, method='clip'):
+@instrumentation.instrument
+def handle_outliers(df, columns=None, method='clip', quantile_method='exact', single_mask=False, return_counts=False,
+                    inplace=False):
     """
     Handle outliers in the specified columns.
     
@@ -44,25 +59,45 @@ def handle_outliers(df, columns=None, method='clip'):
         df (pandas.DataFrame): Input dataframe
         columns (list, optional): List of columns to process. If None, all numeric columns.
         method (str, optional): Method to handle outliers ('clip' or 'remove'). Defaults to 'clip'.
+        quantile_method (str, optional): 'exact' to compute Q1/Q3 with pandas, or 'sketch' to
+            estimate them with quantile_sketch (see QuantileSketch for error bounds). With
+            'sketch' the quartiles of all columns come from one pass over the input.
+            Defaults to 'exact'.
+        single_mask (bool, optional): With method='remove', compute every column's bounds
+            on the original data and drop all outlier rows with one combined mask, so the
+            result does not depend on column order. Defaults to False.
+        return_counts (bool, optional): Also return the number of values clipped (or rows
+            flagged for removal) per column. Defaults to False.
+        inplace (bool, optional): Clip values in df itself instead of a copy. Removing rows
+            still returns a new, filtered frame. Defaults to False.
         
     Returns:
-        pandas.DataFrame: Dataframe with handled outliers
+        pandas.DataFrame: Dataframe with handled outliers, or a (DataFrame, dict) tuple
+            of the dataframe and per-column counts if return_counts is True
     """
-    # Make a copy to avoid modifying the original
-    result_df = df.copy()
+    # Make a copy to avoid modifying the original (the single-mask filter copies on its own)
+    result_df = df if inplace or (single_mask and method == 'remove') else df.copy()
     
     # If no columns specified, use all numeric columns
     if columns is None:
         columns = result_df.select_dtypes(include=['float64', 'int64']).columns
     
+    sketched = quantile_sketch.column_quartiles(result_df, columns) if quantile_method == 'sketch' else None
+    
+    counts = {}
+    keep = np.ones(len(result_df), dtype=bool) if single_mask else None
+    
     for col in columns:
         # Skip if column doesn't exist or isn't numeric
         if col not in result_df.columns or not pd.api.types.is_numeric_dtype(result_df[col]):
             continue
             
         # Calculate Q1, Q3 and IQR
-        Q1 = result_df[col].quantile(0.25)
-        Q3 = result_df[col].quantile(0.75)
+        if sketched is not None:
+            Q1, _, Q3 = sketched[col]
+        else:
+            Q1 = result_df[col].quantile(0.25)
+            Q3 = result_df[col].quantile(0.75)
         IQR = Q3 - Q1
         
         # Define outlier bounds
@@ -71,43 +106,336 @@ def handle_outliers(df, columns=None, method='clip'):
         
         if method == 'clip':
             # Clip values outside the bounds
+            if return_counts:
+                counts[col] = int(((result_df[col] < lower_bound) | (result_df[col] > upper_bound)).sum())
             result_df[col] = result_df[col].clip(lower_bound, upper_bound)
         elif method == 'remove':
             # Remove rows with outlier values
             mask = (result_df[col] >= lower_bound) & (result_df[col] <= upper_bound)
-            result_df = result_df[mask]
+            if return_counts:
+                counts[col] = int(len(mask) - mask.sum())
+            if single_mask:
+                keep &= mask.to_numpy()
+            else:
+                result_df = result_df[mask]
+    
+    if keep is not None and method == 'remove':
+        # Materialize the filtered frame once
+        result_df = result_df[keep]
     
+    if return_counts:
+        return result_df, counts
     return result_df
 
-def prepare_data_for_analysis(df):
+@instrumentation.instrument
+def prepare_data_for_analysis(df, inplace=False):
     """
     Prepare the data for analysis by creating derived features and normalizing values.
     
     Args:
         df (pandas.DataFrame): Cleaned dataframe
+        inplace (bool, optional): Add and normalize columns in df itself instead of a copy.
+            Rows with unrealistic years are still dropped into a new frame. Defaults to False.
         
     Returns:
         pandas.DataFrame: Enhanced dataframe ready for analysis
     """
     # Create a copy to avoid modifying the original
-    enhanced_df = df.copy()
+    enhanced_df = df if inplace else df.copy()
+    
+    # Normalize hotttnesss and familiarity scores to 0-100 range for better interpretability
+    for col in enhanced_df.columns:
+        if 'hotttnesss' in col or 'familiarity' in col:
+            # Some values might be outside 0-1 range, so we clip first, then scale to 0-100
+            enhanced_df[col] = enhanced_df[col].clip(0, 1) * 100
     
     # Convert years to decades for easier trend analysis
     if 'song_year' in enhanced_df.columns:
         # Create a decade column (e.g., 1970, 1980, 1990)
         enhanced_df['decade'] = (enhanced_df['song_year'] // 10) * 10
         
-        # Filter out unrealistic years (e.g., future years or very old ones)
+        # Filter out unrealistic years (e.g., future years or very old ones) with a single mask
         current_year = 2023  # Use the current year as a reference
-        enhanced_df = enhanced_df[enhanced_df['song_year'] <= current_year]
-        enhanced_df = enhanced_df[enhanced_df['song_year'] >= 1900]  # Assuming no relevant music data before 1900
-    
-    # Normalize hotttnesss and familiarity scores to 0-100 range for better interpretability
-    for col in enhanced_df.columns:
-        if 'hotttnesss' in col or 'familiarity' in col:
-            # Some values might be outside 0-1 range, so we clip first
-            enhanced_df[col] = enhanced_df[col].clip(0, 1)
-            # Then scale to 0-100
-            enhanced_df[col] = enhanced_df[col] * 100
+        valid_years = (enhanced_df['song_year'] <= current_year) & (enhanced_df['song_year'] >= 1900)  # Assuming no relevant music data before 1900
+        if not valid_years.all():
+            enhanced_df = enhanced_df[valid_years]
     
     return enhanced_df
+
+@instrumentation.instrument
+def run_pipeline(df=None, outlier_method=None, outlier_columns=None, quantile_method='exact'):
+    """
+    Run the full load → flatten → clean → (outliers) → prepare path without intermediate copies.
+    
+    The flattened frame is built straight from the columnar store and every stage
+    then works in place on it, so peak memory stays close to one copy of the dataset.
+    
+    Args:
+        df (pandas.DataFrame, optional): A flattened dataframe to process in place. If None,
+            the dataset is loaded with data_loader.load_flat_music_data.
+        outlier_method (str, optional): 'clip' or 'remove' to run handle_outliers (removal uses
+            a single combined mask). If None, outliers are left alone.
+        outlier_columns (list, optional): Columns for handle_outliers. If None, all numeric columns.
+        quantile_method (str, optional): 'exact' or 'sketch' for medians and quartiles. Defaults to 'exact'.
+        
+    Returns:
+        pandas.DataFrame: The prepared dataframe
+    """
+    if df is None:
+        import data_loader
+        df = data_loader.load_flat_music_data()
+    
+    df = clean_music_data(df, quantile_method=quantile_method, inplace=True)
+    if outlier_method is not None:
+        df = handle_outliers(df, columns=outlier_columns, method=outlier_method, quantile_method=quantile_method,
+                             single_mask=True, inplace=True)
+    return prepare_data_for_analysis(df, inplace=True)
+
+@instrumentation.instrument
+def iter_frame_chunks(df, chunk_size=100000):
+    """
+    Split a DataFrame into consecutive row chunks.
+    
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        chunk_size (int, optional): Rows per chunk. Defaults to 100000.
+        
+    Returns:
+        generator: DataFrame chunks (views, not copies)
+    """
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def _uses_zero_fill(col):
+    """Return True if clean_music_data fills missing values of this column with 0 instead of the median."""
+    return not col.endswith('_year') and ('hotttnesss' in col or 'familiarity' in col)
+
+def _histogram_quantile(counts, edges, q):
+    """
+    Estimate a quantile from a fixed-width histogram, interpolating inside the bin.
+    
+    Args:
+        counts (numpy.ndarray): Bin counts
+        edges (numpy.ndarray): Bin edges (len(counts) + 1)
+        q (float): Quantile between 0 and 1
+        
+    Returns:
+        float: The estimated quantile (NaN for an empty histogram)
+    """
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    position = q * (total - 1)
+    cumulative = np.cumsum(counts)
+    b = int(np.searchsorted(cumulative, position, side='right'))
+    b = min(b, len(counts) - 1)
+    before = cumulative[b - 1] if b > 0 else 0
+    fraction = (position - before + 0.5) / counts[b] if counts[b] else 0.5
+    return edges[b] + min(max(fraction, 0.0), 1.0) * (edges[b + 1] - edges[b])
+
+def _counts_quantile(values, counts, q):
+    """
+    Exact quantile of data given as sorted distinct values and their counts.
+    
+    Interpolates linearly between the two nearest ranks, like pandas.Series.quantile.
+    
+    Args:
+        values (numpy.ndarray): Sorted distinct values
+        counts (numpy.ndarray): Number of occurrences of each value
+        q (float): Quantile between 0 and 1
+        
+    Returns:
+        float: The quantile (NaN if there are no values)
+    """
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    position = q * (total - 1)
+    cumulative = np.cumsum(counts)
+    below = values[int(np.searchsorted(cumulative, np.floor(position), side='right'))]
+    above = values[int(np.searchsorted(cumulative, np.ceil(position), side='right'))]
+    return float(below + (position - np.floor(position)) * (above - below))
+
+def _exact_quartiles(values, counts, fill, n_missing):
+    """(Q1, Q3) of exact value counts after n_missing entries are filled with fill."""
+    if n_missing and pd.notna(fill):
+        position = int(np.searchsorted(values, fill))
+        if position < len(values) and values[position] == fill:
+            counts = counts.copy()
+            counts[position] += n_missing
+        else:
+            # A median halfway between two values is not one of them
+            values = np.insert(values, position, fill)
+            counts = np.insert(counts, position, n_missing)
+    return _counts_quantile(values, counts, 0.25), _counts_quantile(values, counts, 0.75)
+
+# Integer-valued columns spanning at most this many values are counted exactly
+EXACT_COUNT_RANGE = 1 << 20
+
+@instrumentation.instrument
+def compute_streaming_stats(chunk_source, bins=4096, quantile_method='histogram'):
+    """
+    Compute the global statistics the cleaning pipeline needs, with memory bounded by the chunk size.
+    
+    With quantile_method='histogram' this makes two passes over the chunks: the first
+    finds each numeric column's range and missing count, the second fills a fixed-width
+    histogram per column. Medians and quartiles are read from the histograms, so each is
+    within one bin width ((max - min) / bins) of the exact value. Integer-valued columns
+    (such as song_year) whose range spans at most EXACT_COUNT_RANGE values are counted
+    per value instead, so their fill values and quartiles are exact. With 'sketch' it makes
+    a single pass, merging one quantile sketch per column and chunk (see
+    quantile_sketch.QuantileSketch for error bounds).
+    
+    Args:
+        chunk_source (callable): Zero-argument function returning a fresh iterator of DataFrame chunks
+        bins (int, optional): Histogram bins per column. Defaults to 4096.
+        quantile_method (str, optional): 'histogram' or 'sketch'. Defaults to 'histogram'.
+        
+    Returns:
+        dict: 'fill_values' (value used for missing entries) and 'quartiles' ((Q1, Q3) after filling) per numeric column
+    """
+    if quantile_method == 'sketch':
+        return _compute_sketch_stats(chunk_source)
+    
+    # Pass 1: range, missing count and integrality of every numeric column
+    ranges = {}
+    missing = {}
+    integral = {}
+    for chunk in chunk_source():
+        for col in chunk.select_dtypes(include=['float64', 'int64']).columns:
+            values = chunk[col]
+            lo, hi = values.min(), values.max()
+            if col not in ranges:
+                ranges[col] = [np.inf, -np.inf]
+                missing[col] = 0
+                integral[col] = True
+            if pd.notna(lo):
+                ranges[col] = [min(ranges[col][0], lo), max(ranges[col][1], hi)]
+            missing[col] += int(values.isna().sum())
+            if integral[col] and values.dtype.kind == 'f':
+                present = values.dropna().to_numpy()
+                integral[col] = bool(np.all(np.isfinite(present)) and np.all(present == np.floor(present)))
+    
+    edges = {}
+    exact = {}
+    for col, (lo, hi) in ranges.items():
+        if not np.isfinite(lo):
+            lo, hi = 0.0, 0.0
+        if _uses_zero_fill(col):
+            # Keep the fill value inside the histogram range
+            lo, hi = min(lo, 0.0), max(hi, 0.0)
+        if integral[col] and hi - lo < EXACT_COUNT_RANGE:
+            # One count per integer value in [lo, hi]
+            exact[col] = np.arange(lo, hi + 1, dtype=np.float64)
+            continue
+        if hi == lo:
+            hi = lo + 1.0
+        edges[col] = np.linspace(lo, hi, bins + 1)
+    
+    # Pass 2: histogram (or exact value counts) of the non-missing values
+    counts = {col: np.zeros(bins, dtype=np.int64) for col in edges}
+    counts.update({col: np.zeros(len(values), dtype=np.int64) for col, values in exact.items()})
+    for chunk in chunk_source():
+        for col in counts:
+            if col in chunk.columns:
+                values = chunk[col].dropna().to_numpy(dtype=np.float64)
+                if col in exact:
+                    counts[col] += np.bincount((values - exact[col][0]).astype(np.int64), minlength=len(exact[col]))
+                else:
+                    counts[col] += np.histogram(values, bins=edges[col])[0]
+    
+    fill_values = {}
+    quartiles = {}
+    for col in ranges:
+        if col in exact:
+            fill = 0 if _uses_zero_fill(col) else _counts_quantile(exact[col], counts[col], 0.5)
+            quartiles[col] = _exact_quartiles(exact[col], counts[col], fill, missing[col])
+            fill_values[col] = fill
+            continue
+        
+        fill = 0 if _uses_zero_fill(col) else _histogram_quantile(counts[col], edges[col], 0.5)
+        fill_values[col] = fill
+        
+        # Quartiles are taken after cleaning, so the filled entries count at the fill value
+        filled_counts = counts[col].copy()
+        if missing[col] and pd.notna(fill):
+            b = min(int(np.searchsorted(edges[col], fill, side='right')) - 1, bins - 1)
+            filled_counts[max(b, 0)] += missing[col]
+        quartiles[col] = (_histogram_quantile(filled_counts, edges[col], 0.25),
+                          _histogram_quantile(filled_counts, edges[col], 0.75))
+    
+    return {'fill_values': fill_values, 'quartiles': quartiles}
+
+def _compute_sketch_stats(chunk_source):
+    """Single-pass variant of compute_streaming_stats using mergeable quantile sketches."""
+    sketches = {}
+    missing = {}
+    for chunk in chunk_source():
+        for col, sketch in quantile_sketch.sketch_columns(chunk).items():
+            if col in sketches:
+                sketches[col].merge(sketch)
+            else:
+                sketches[col] = sketch
+                missing[col] = 0
+            missing[col] += int(chunk[col].isna().sum())
+    
+    fill_values = {}
+    quartiles = {}
+    for col, sketch in sketches.items():
+        fill = 0 if _uses_zero_fill(col) else sketch.quantile(0.5)
+        fill_values[col] = fill
+        
+        # Quartiles are taken after cleaning, so the filled entries count at the fill value
+        if missing[col] and pd.notna(fill):
+            sketch.add_weighted(fill, missing[col])
+        Q1, Q3 = sketch.quantiles([0.25, 0.75])
+        quartiles[col] = (Q1, Q3)
+    
+    return {'fill_values': fill_values, 'quartiles': quartiles}
+
+@instrumentation.instrument
+def stream_clean_pipeline(chunk_source, outlier_columns=None, outlier_method='clip', stats=None):
+    """
+    Push DataFrame chunks through clean → outlier handling → analysis preparation.
+    
+    Global statistics (median fill values and IQR bounds) are computed up front by
+    compute_streaming_stats unless given, and every chunk is then processed with
+    the same values, so peak memory depends on the chunk size and not the dataset size.
+    
+    Args:
+        chunk_source (callable): Zero-argument function returning a fresh iterator of DataFrame chunks
+        outlier_columns (list, optional): Columns to handle outliers in. If None, all numeric columns.
+        outlier_method (str, optional): 'clip' or 'remove'. Defaults to 'clip'.
+        stats (dict, optional): Precomputed result of compute_streaming_stats
+        
+    Returns:
+        generator: Processed DataFrame chunks ready for analysis
+    """
+    if stats is None:
+        stats = compute_streaming_stats(chunk_source)
+    
+    for chunk in chunk_source():
+        # Clean: fill missing values with the global fill values
+        chunk = chunk.fillna(value={col: fill for col, fill in stats['fill_values'].items() if col in chunk.columns})
+        text_cols = chunk.select_dtypes(include=['object']).columns
+        chunk[text_cols] = chunk[text_cols].fillna('Unknown')
+        
+        # Handle outliers with the global IQR bounds
+        columns = outlier_columns if outlier_columns is not None else list(stats['quartiles'])
+        keep = np.ones(len(chunk), dtype=bool)
+        for col in columns:
+            if col not in chunk.columns or col not in stats['quartiles'] or not pd.api.types.is_numeric_dtype(chunk[col]):
+                continue
+            Q1, Q3 = stats['quartiles'][col]
+            IQR = Q3 - Q1
+            lower_bound = Q1 - 1.5 * IQR
+            upper_bound = Q3 + 1.5 * IQR
+            if outlier_method == 'clip':
+                chunk[col] = chunk[col].clip(lower_bound, upper_bound)
+            elif outlier_method == 'remove':
+                keep &= ((chunk[col] >= lower_bound) & (chunk[col] <= upper_bound)).to_numpy()
+        if not keep.all():
+            chunk = chunk[keep]
+        
+        # Prepare: decade derivation, year filtering and normalization are all row-local
+        yield prepare_data_for_analysis(chunk)
@@ -1,7 +1,12 @@
 import music
 import pandas as pd
 import numpy as np
+import json
+import os
+import shutil
+import instrumentation
 
+@instrumentation.instrument
 def load_music_data():
     """
     Load the CORGIS music dataset and convert it to a pandas DataFrame for easier analysis.
@@ -9,12 +14,13 @@ def load_music_data():
     Returns:
         pandas.DataFrame: A DataFrame containing the music dataset
     """
-    # Load the raw data from the music module
-    raw_data = music.get_music()
+    # Load the raw data from the music module as nested dictionaries
+    raw_data = music.get_music().to_records()
     
     # Convert to pandas DataFrame for easier manipulation
     return pd.DataFrame(raw_data)
 
+@instrumentation.instrument
 def explore_data_structure(df):
     """
     Explore and return basic information about the dataset structure.
@@ -42,34 +48,237 @@ def explore_data_structure(df):
     
     return structure
 
+# Nested features extracted into flat 'artist_*' and 'song_*' columns
+ARTIST_FEATURES = ['familiarity', 'hotttnesss', 'id', 'latitude', 'longitude', 'name', 'terms', 'terms_freq']
+SONG_FEATURES = ['duration', 'hotttnesss', 'key', 'loudness', 'tempo', 'time_signature', 'title', 'year']
+
+# Text features; every other flattened feature is numeric
+_TEXT_FEATURES = {'artist_id', 'artist_name', 'artist_terms', 'song_title'}
+
+def _section_frame(values, prefix, features, index):
+    """
+    Build the flat columns for one nested section in a single traversal.
+    
+    Args:
+        values (iterable): The nested dictionaries of one section (non-dicts are treated as empty)
+        prefix (str): Column prefix such as 'artist'
+        features (list): Keys to extract from each dictionary
+        index (pandas.Index): Index of the resulting DataFrame
+        
+    Returns:
+        pandas.DataFrame: One column per feature, named '<prefix>_<feature>'
+    """
+    records = [value if isinstance(value, dict) else {} for value in values]
+    section_df = pd.DataFrame.from_records(records, columns=features)
+    section_df.columns = [f'{prefix}_{feature}' for feature in features]
+    section_df.index = index
+    
+    # Give numeric features a numeric dtype even when values are missing
+    for col in section_df.columns:
+        if col not in _TEXT_FEATURES and not pd.api.types.is_numeric_dtype(section_df[col]):
+            section_df[col] = pd.to_numeric(section_df[col], errors='coerce')
+    
+    return section_df
+
+@instrumentation.instrument
 def flatten_nested_features(df):
     """
     Flatten nested features in the DataFrame for easier analysis.
     
+    Each nested column is traversed once to build all of its flat columns.
+    
     Args:
         df (pandas.DataFrame): The music dataset with nested features
         
     Returns:
         pandas.DataFrame: A flattened DataFrame with extracted features
     """
-    # Create a copy of the DataFrame to avoid modifying the original
-    flattened_df = df.copy()
+    # Keep any non-nested columns alongside the extracted features
+    other_df = df.drop(columns=['artist', 'song', 'release'], errors='ignore')
+    
+    artist_df = _section_frame(df['artist'], 'artist', ARTIST_FEATURES, df.index)
+    song_df = _section_frame(df['song'], 'song', SONG_FEATURES, df.index)
+    
+    return pd.concat([other_df, artist_df, song_df], axis=1)
+
+@instrumentation.instrument
+def flatten_music_columns(store):
+    """
+    Build the flattened DataFrame straight from a columnar store, with no nested intermediate.
+    
+    Args:
+        store (music.MusicColumns): The columnar music dataset
+        
+    Returns:
+        pandas.DataFrame: The same columns flatten_nested_features produces
+    """
+    flat = {}
+    for section, features in (('artist', ARTIST_FEATURES), ('song', SONG_FEATURES)):
+        for feature in features:
+            column = store.column(f'{section}.{feature}')
+            if column.dtype.kind in ('i', 'u'):
+                # Widen downcast integers back to the int64 the cleaning steps expect
+                column = column.astype(np.int64)
+            flat[f'{section}_{feature}'] = column
+    
+    return pd.DataFrame(flat)
+
+@instrumentation.instrument
+def load_flat_music_data():
+    """
+    Load the music dataset directly as a flattened DataFrame.
+    
+    Returns:
+        pandas.DataFrame: The flattened music dataset
+    """
+    return flatten_music_columns(music.get_music_columns())
+
+class _StringColumn:
+    """
+    Memory-mapped string column stored as a UTF-8 heap plus an offsets array.
+    
+    Value i is heap[offsets[i]:offsets[i + 1]]; only the slices that are read get paged in.
+    """
+    
+    def __init__(self, heap, offsets, missing=None):
+        self.heap = heap
+        self.offsets = offsets
+        self.missing = missing
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, index):
+        if self.missing is not None and self.missing[index]:
+            return None
+        return bytes(self.heap[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+    
+    def to_numpy(self):
+        """Decode the whole column into an object array."""
+        heap = bytes(self.heap)
+        offsets = self.offsets.tolist()
+        values = np.array([heap[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+        if self.missing is not None:
+            values[np.asarray(self.missing)] = None
+        return values
+
+class MusicMmap:
+    """
+    A flattened music dataset opened from disk with every column memory-mapped.
+    
+    Numeric columns are returned as read-only np.memmap arrays and string columns
+    as _StringColumn objects, so opening a dataset reads only its small metadata file.
+    """
+    
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = meta
+        self._columns = {}
+    
+    def __len__(self):
+        return self.meta['length']
+    
+    @property
+    def columns(self):
+        return list(self.meta['columns'])
+    
+    def __getitem__(self, name):
+        if name not in self._columns:
+            kind = self.meta['columns'][name]
+            base = os.path.join(self.path, name)
+            if kind == 'string':
+                missing = np.load(f'{base}.missing.npy', mmap_mode='r') if name in self.meta['missing'] else None
+                self._columns[name] = _StringColumn(np.load(f'{base}.heap.npy', mmap_mode='r'),
+                                                    np.load(f'{base}.offsets.npy', mmap_mode='r'),
+                                                    missing)
+            else:
+                self._columns[name] = np.load(f'{base}.npy', mmap_mode='r')
+        return self._columns[name]
+    
+    def to_frame(self, columns=None):
+        """
+        Build a DataFrame from the requested columns only.
+        
+        Numeric columns are wrapped without copying; string columns are decoded.
+        
+        Args:
+            columns (list, optional): Columns to include. If None, all columns.
+            
+        Returns:
+            pandas.DataFrame: The selected columns
+        """
+        data = {}
+        for name in columns or self.columns:
+            column = self[name]
+            data[name] = column.to_numpy() if isinstance(column, _StringColumn) else np.asarray(column)
+        return pd.DataFrame(data, copy=False)
+
+@instrumentation.instrument
+def save_music_mmap(df, path):
+    """
+    Write a flattened DataFrame in the memory-mapped dataset format.
+    
+    Each numeric column becomes one contiguous .npy file; each text column becomes a
+    UTF-8 heap with an offsets array (and a mask if any value is missing).
     
-    # Process artist features
-    artist_features = ['familiarity', 'hotttnesss', 'id', 'latitude', 'longitude', 'name', 'terms', 'terms_freq']
-    for feature in artist_features:
-        flattened_df[f'artist_{feature}'] = flattened_df['artist'].apply(
-            lambda x: x.get(feature) if isinstance(x, dict) and feature in x else None
-        )
+    The dataset is written into a temporary directory next to path and renamed into
+    place once complete, so a failed save never leaves a partial dataset and a
+    re-save replaces every file of the previous one.
     
-    # Process song features - selecting a subset of important features
-    song_features = ['duration', 'hotttnesss', 'key', 'loudness', 'tempo', 'time_signature', 'title', 'year']
-    for feature in song_features:
-        flattened_df[f'song_{feature}'] = flattened_df['song'].apply(
-            lambda x: x.get(feature) if isinstance(x, dict) and feature in x else None
-        )
+    Args:
+        df (pandas.DataFrame): A flattened music dataframe
+        path (str): Directory to write the dataset to
+    """
+    path = os.path.normpath(path)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    try:
+        _write_music_mmap(df, tmp_path)
+        if os.path.exists(path):
+            old_path = f'{path}.{os.getpid()}.old'
+            os.rename(path, old_path)
+            os.rename(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.rename(tmp_path, path)
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+def _write_music_mmap(df, path):
+    meta = {'length': len(df), 'columns': {}, 'missing': []}
     
-    # Drop the original nested columns
-    flattened_df = flattened_df.drop(['artist', 'song', 'release'], axis=1)
+    for col in df.columns:
+        base = os.path.join(path, col)
+        if pd.api.types.is_numeric_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+            np.save(f'{base}.npy', np.ascontiguousarray(df[col].to_numpy()))
+            meta['columns'][col] = 'numeric'
+        else:
+            missing = df[col].isna().to_numpy()
+            encoded = [b'' if m else str(value).encode('utf-8') for m, value in zip(missing, df[col].tolist())]
+            offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+            np.cumsum([len(value) for value in encoded], out=offsets[1:])
+            np.save(f'{base}.heap.npy', np.frombuffer(b''.join(encoded), dtype=np.uint8))
+            np.save(f'{base}.offsets.npy', offsets)
+            if missing.any():
+                np.save(f'{base}.missing.npy', missing)
+                meta['missing'].append(col)
+            meta['columns'][col] = 'string'
     
-    return flattened_df
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+@instrumentation.instrument
+def load_music_mmap(path):
+    """
+    Open a dataset written by save_music_mmap without reading any column data.
+    
+    Args:
+        path (str): Directory the dataset was written to
+        
+    Returns:
+        MusicMmap: Lazily memory-mapped columns of the dataset
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    return MusicMmap(path, meta)
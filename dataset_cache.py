@@ -0,0 +1,201 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+def dataset_nbytes(value):
+    """
+    Memory footprint of a cached dataset.
+
+    Args:
+        value: A MusicColumns store, DataFrame, NumPy array or other object
+
+    Returns:
+        int: Bytes held by the value (deep for DataFrames)
+    """
+    if hasattr(value, 'memory_usage'):
+        return int(value.memory_usage(deep=True).sum())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+class _Load:
+    """A load in progress that other callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class DatasetCache:
+    """
+    LRU cache of in-memory datasets, bounded by their total memory footprint.
+
+    Keys describe the dataset (e.g. (n_records, seed), or a tuple naming a filtered
+    subset). Concurrent requests for a key that is not cached share a single load:
+    the first caller runs the loader and the others wait for its result. Pinned
+    keys are never evicted. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes=2 * 1024 ** 3, sizeof=dataset_nbytes):
+        """
+        Args:
+            max_bytes (int, optional): Memory cap for cached datasets. Defaults to 2 GiB.
+            sizeof (callable, optional): Returns the footprint of a dataset in bytes.
+                Defaults to dataset_nbytes.
+        """
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.load_errors = 0
+        self.load_seconds = 0.0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._pinned = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_load(self, key, loader):
+        """
+        Get a dataset, loading it once on a miss.
+
+        Args:
+            key (hashable): Dataset parameters
+            loader (callable): Zero-argument function building the dataset
+
+        Returns:
+            The cached or freshly loaded dataset
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            load = self._loading.get(key)
+            leader = load is None
+            if leader:
+                load = self._loading[key] = _Load()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.value
+
+        start = time.perf_counter()
+        try:
+            value = loader()
+            size = self.sizeof(value)
+        except BaseException as error:
+            with self._lock:
+                self.load_errors += 1
+                del self._loading[key]
+            load.error = error
+            load.done.set()
+            raise
+
+        with self._lock:
+            self.load_seconds += time.perf_counter() - start
+            del self._loading[key]
+            if size <= self.max_bytes or key in self._pinned:
+                self._entries[key] = (value, size)
+                self.current_bytes += size
+                self._evict()
+        load.value = value
+        load.done.set()
+        return value
+
+    def _evict(self):
+        """Drop least recently used unpinned entries until the cache fits (lock held)."""
+        for key in list(self._entries):
+            if self.current_bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            self.current_bytes -= self._entries.pop(key)[1]
+            self.evictions += 1
+
+    def pin(self, key):
+        """
+        Never evict a key (it may be pinned before it is loaded).
+
+        Args:
+            key (hashable): Dataset parameters
+        """
+        with self._lock:
+            self._pinned.add(key)
+
+    def unpin(self, key):
+        """
+        Let a pinned key be evicted again.
+
+        Args:
+            key (hashable): Dataset parameters
+        """
+        with self._lock:
+            self._pinned.discard(key)
+            self._evict()
+
+    def resize(self, key):
+        """
+        Re-measure a cached dataset that grew or shrank in place, evicting others if needed.
+
+        Args:
+            key (hashable): Dataset parameters
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            size = self.sizeof(entry[0])
+            self._entries[key] = (entry[0], size)
+            self.current_bytes += size - entry[1]
+            self._evict()
+
+    def discard(self, key):
+        """
+        Drop one dataset if it is cached.
+
+        Args:
+            key (hashable): Dataset parameters
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry[1]
+
+    def clear(self):
+        """Drop every dataset (pins and metrics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entry count, stored bytes, hits, misses, coalesced waits, evictions,
+                failed loads and total seconds spent loading
+        """
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'load_errors': self.load_errors,
+            'load_seconds': self.load_seconds,
+        }
@@ -0,0 +1,177 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Columns each Visualization builder reads; only these go into its fingerprint
+FIGURE_COLUMNS = {
+    'plot_decade_trend': ['decade', 'song_hotttnesss'],
+    'plot_key_distribution': ['song_key'],
+    'create_tempo_histogram': ['song_tempo'],
+    'plot_loudness_vs_popularity': ['song_loudness', 'song_hotttnesss'],
+    'create_artist_location_map': ['artist_latitude', 'artist_longitude', 'artist_hotttnesss', 'artist_name'],
+}
+
+# Rows sampled per column when fingerprinting
+_SAMPLE_ROWS = 1024
+
+def frame_fingerprint(df, columns=None):
+    """
+    Cheap fingerprint of the columns a figure depends on.
+
+    Combines the row count, dtypes, a strided sample of each column and, for numeric
+    columns, the sum and missing count, so edits anywhere in a numeric column change it.
+
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        columns (list, optional): Columns to include. If None, all columns.
+
+    Returns:
+        str: A hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(len(df)).encode())
+    step = max(len(df) // _SAMPLE_ROWS, 1)
+    for col in columns if columns is not None else df.columns:
+        if col not in df.columns:
+            digest.update(f'missing:{col}'.encode())
+            continue
+        series = df[col]
+        digest.update(f'{col}:{series.dtype}'.encode())
+        sample = series.iloc[::step]
+        digest.update(pd.util.hash_pandas_object(sample, index=False).to_numpy().tobytes())
+        if pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            digest.update(np.array([np.nansum(values), np.isnan(values).sum()]).tobytes())
+    return digest.hexdigest()
+
+class FigureCache:
+    """
+    LRU cache of rendered figures, bounded by the total size of what it stores.
+
+    Matplotlib figures are stored as PNG bytes and Plotly figures as JSON, so a hit
+    costs no figure construction. Safe to share between threads.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes (int, optional): Memory cap for stored payloads. Defaults to 64 MiB.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Look up a rendered figure, marking it most recently used.
+
+        Returns:
+            tuple: (kind, payload) with kind 'png' or 'plotly', or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, kind, payload):
+        """
+        Store a rendered figure, evicting least recently used entries over the memory cap.
+
+        Args:
+            key (tuple): Cache key
+            kind (str): 'png' or 'plotly'
+            payload (bytes or str): PNG bytes or Plotly JSON
+        """
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= len(self._entries.pop(key)[1])
+            self._entries[key] = (kind, payload)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (metrics are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Entry count, stored bytes, hits, misses and evictions
+        """
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+# Cache used by render_figure unless another one is passed
+FIGURE_CACHE = FigureCache()
+
+def serialize_figure(fig):
+    """Turn a matplotlib or Plotly figure into a ('png' | 'plotly', payload) pair."""
+    if hasattr(fig, 'to_json'):
+        return 'plotly', fig.to_json()
+
+    import matplotlib.pyplot as plt
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    plt.close(fig)
+    return 'png', buffer.getvalue()
+
+def render_figure(builder, df, *args, cache=None, **kwargs):
+    """
+    Render a Visualization builder through the figure cache.
+
+    The key is the builder name, a fingerprint of the columns it reads (see
+    FIGURE_COLUMNS) and its arguments. On a miss the builder runs and its figure is
+    stored as PNG bytes (matplotlib) or JSON (Plotly).
+
+    Args:
+        builder (callable): A figure builder such as Visualization.plot_decade_trend
+        df (pandas.DataFrame): The prepared music dataframe
+        *args, **kwargs: Extra arguments for the builder
+        cache (FigureCache, optional): Cache to use. Defaults to FIGURE_CACHE.
+
+    Returns:
+        tuple: (kind, payload) with kind 'png' (bytes, for st.image) or 'plotly'
+            (JSON, for plotly.io.from_json), or None if the builder produced no figure
+    """
+    cache = cache if cache is not None else FIGURE_CACHE
+    name = getattr(builder, '__name__', repr(builder))
+    key = (name, frame_fingerprint(df, FIGURE_COLUMNS.get(name)), repr(args), repr(sorted(kwargs.items())))
+
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    fig = builder(df, *args, **kwargs)
+    if fig is None:
+        return None
+    kind, payload = serialize_figure(fig)
+    cache.put(key, kind, payload)
+    return kind, payload
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+def content_hash(df, columns=None):
+    """
+    Hash of every value in the given columns.
+
+    Unlike figure_cache.frame_fingerprint this reads every row, so any edit to the
+    columns (including text columns) changes it; it is safe to key computed results on.
+
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        columns (list, optional): Columns to include. If None, all columns.
+
+    Returns:
+        str: A hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(repr(len(df)).encode())
+    for col in columns if columns is not None else df.columns:
+        if col not in df.columns:
+            digest.update(f'missing:{col}'.encode())
+            continue
+        series = df[col]
+        digest.update(f'{col}:{series.dtype}'.encode())
+        digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+class FrameCache:
+    """
+    LRU cache of values derived from a dataframe, keyed on the content of the columns
+    they read.
+
+    Keys combine content_hash of those columns with any extra parameters, so an
+    equal copy of a frame shares its entry and in-place edits to the columns (e.g.
+    data_cleaner.handle_outliers(inplace=True)) miss instead of returning stale
+    results. Safe to share between threads.
+    """
+
+    def __init__(self, max_entries=32):
+        """
+        Args:
+            max_entries (int, optional): Number of values kept. Defaults to 32.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_build(self, df, columns, build, *params):
+        """
+        Get the value for a frame, building it on a miss.
+
+        Args:
+            df (pandas.DataFrame): Input dataframe
+            columns (list): Columns the value depends on (None for all)
+            build (callable): Zero-argument function computing the value
+            *params: Extra hashable parameters the value depends on
+
+        Returns:
+            The cached or freshly built value
+        """
+        key = (content_hash(df, columns),) + params
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every entry (metrics are kept)."""
+        with self._lock:
+            self._entries.clear()
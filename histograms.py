@@ -0,0 +1,120 @@
+import numpy as np
+
+import frame_cache
+
+class Histogram:
+    """
+    Bin edges and counts computed once with np.histogram.
+
+    Histograms over the same edges can be merged, so counts can be accumulated
+    chunk by chunk; renderers draw from the counts without touching raw values.
+    """
+
+    def __init__(self, edges, counts):
+        """
+        Args:
+            edges (numpy.ndarray): Bin edges (len(counts) + 1)
+            counts (numpy.ndarray): Count per bin
+        """
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, values, bins=30, range=None):
+        """
+        Count values into bins (NaNs are ignored).
+
+        Args:
+            values (array-like): Raw values
+            bins (int, str or array-like, optional): Number of equal-width bins, an
+                adaptive rule understood by np.histogram_bin_edges ('auto', 'fd', ...),
+                or explicit edges. Defaults to 30.
+            range (tuple, optional): (min, max) of the bins. Defaults to the data range.
+
+        Returns:
+            Histogram: The binned counts
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        edges = np.histogram_bin_edges(values, bins=bins, range=range)
+        counts, edges = np.histogram(values, bins=edges)
+        return cls(edges, counts)
+
+    def add(self, values):
+        """
+        Count more values into the existing bins (values outside them are dropped).
+
+        Args:
+            values (array-like): Raw values from a new chunk
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.counts = self.counts + np.histogram(values[~np.isnan(values)], bins=self.edges)[0]
+
+    def merge(self, other):
+        """
+        Add another histogram's counts.
+
+        Args:
+            other (Histogram): A histogram with the same edges
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Only histograms with identical bin edges can be merged")
+        self.counts = self.counts + other.counts
+
+    @property
+    def centers(self):
+        return (self.edges[:-1] + self.edges[1:]) / 2
+
+    @property
+    def widths(self):
+        return np.diff(self.edges)
+
+    def plot_matplotlib(self, ax, **kwargs):
+        """
+        Draw the histogram on a matplotlib axis from the precomputed counts.
+
+        Args:
+            ax (matplotlib.axes.Axes): Axis to draw on
+            **kwargs: Passed to ax.hist (e.g. color, edgecolor)
+
+        Returns:
+            tuple: What ax.hist returns
+        """
+        return ax.hist(self.edges[:-1], bins=self.edges, weights=self.counts, **kwargs)
+
+    def plotly_trace(self, **kwargs):
+        """
+        Build a Plotly bar trace from the precomputed counts.
+
+        Args:
+            **kwargs: Passed to plotly.graph_objects.Bar
+
+        Returns:
+            plotly.graph_objects.Bar: One bar per bin
+        """
+        import plotly.graph_objects as go
+        widths = self.widths
+        if len(widths) and np.allclose(widths, widths[0]):
+            # Equal-width bins: let the layout's bargap space the bars like px.histogram
+            return go.Bar(x=self.centers, y=self.counts, **kwargs)
+        return go.Bar(x=self.centers, y=self.counts, width=widths, **kwargs)
+
+# Histograms built by histogram_for, keyed by column content and bin spec
+_HISTOGRAMS = frame_cache.FrameCache()
+
+def histogram_for(df, column, bins=30, range=None):
+    """
+    Get a column's histogram, computing it once per column content and bin spec.
+
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        column (str): Column to bin
+        bins (int or str, optional): Bin count or adaptive rule. Defaults to 30.
+        range (tuple, optional): (min, max) of the bins. Defaults to the data range.
+
+    Returns:
+        Histogram: The cached histogram
+    """
+    def build():
+        return Histogram.from_values(df[column].to_numpy(dtype=np.float64, na_value=np.nan), bins, range)
+    return _HISTOGRAMS.get_or_build(df, [column], build, column, bins, range)
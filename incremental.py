@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+import music
+import data_loader
+import data_cleaner
+import quantile_sketch
+import aggregate_cube
+import artist_geography
+
+class MusicState:
+    """
+    Derived state of the music dataset that is updated batch by batch.
+
+    Holds the flattened frame, mergeable sketches behind the cleaning fill values,
+    and the per-decade, per-key and per-region aggregates used by analysis.py.
+    Each ingested batch is flattened, cleaned with the current fill values and
+    folded into the aggregates; nothing already ingested is rescanned.
+    """
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store (music.MusicColumns, optional): Records to start from. If None, the
+                current music dataset.
+        """
+        self._flat_chunks = []
+        self._flat = None
+        self.sketches = {}
+        self.missing = {}
+        self.cube = aggregate_cube.AggregateCube()
+        self.key_counts = pd.Series(dtype=np.int64)
+        self.region_counts = pd.Series(dtype=np.int64)
+        self.add_batch(store if store is not None else music.get_music_columns())
+
+    def add_batch(self, batch):
+        """
+        Fold one batch of records into the derived state.
+
+        Args:
+            batch (music.MusicColumns): The new records
+        """
+        flat = data_loader.flatten_music_columns(batch)
+        self._flat_chunks.append(flat)
+        self._flat = None
+
+        # Update the running sketches, then clean the batch with the new fill values
+        for col, sketch in quantile_sketch.sketch_columns(flat).items():
+            if col in self.sketches:
+                self.sketches[col].merge(sketch)
+            else:
+                self.sketches[col] = sketch
+                self.missing[col] = 0
+            self.missing[col] += int(flat[col].isna().sum())
+        cleaned = flat.fillna(value=self.fill_values())
+        prepared = data_cleaner.prepare_data_for_analysis(cleaned, inplace=True)
+
+        if len(prepared):
+            self.cube.update(prepared)
+            self.key_counts = self.key_counts.add(prepared['song_key'].value_counts(), fill_value=0).astype(np.int64)
+            regions = artist_geography.region_counts(prepared)
+            self.region_counts = self.region_counts.add(pd.Series(regions.to_numpy(), index=regions.index.astype(str)), fill_value=0).astype(np.int64)
+
+    @property
+    def flat(self):
+        """The flattened frame of every record ingested so far (concatenated on first access)."""
+        if self._flat is None:
+            self._flat_chunks = [pd.concat(self._flat_chunks, ignore_index=True)]
+            self._flat = self._flat_chunks[0]
+        return self._flat
+
+    def fill_values(self):
+        """
+        Values clean_music_data would use for missing entries, from the running sketches.
+
+        Returns:
+            dict: Fill value per numeric column (0 for hotttnesss/familiarity, else the median)
+        """
+        return {col: 0 if data_cleaner._uses_zero_fill(col) else sketch.quantile(0.5)
+                for col, sketch in self.sketches.items()}
+
+def track_ingestion():
+    """
+    Create a MusicState for the current dataset and keep it updated on every music.ingest().
+
+    Returns:
+        MusicState: The tracked state
+    """
+    state = MusicState()
+    music.add_ingest_listener(state.add_batch)
+    return state
@@ -0,0 +1,312 @@
+import bisect
+import cProfile
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Sequence
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000]
+
+# Instrumentation state; instrumented functions only check _ENABLED while it is off
+_ENABLED = False
+_TRACE_ALLOCATIONS = False
+_STARTED_TRACEMALLOC = False
+_PROFILER = None
+_SNAPSHOT = None
+
+_STATS = {}
+_LOCK = threading.Lock()
+
+# Per-thread stack of open allocation measurements: [traced bytes at entry, highest peak seen]
+_ALLOCATIONS = threading.local()
+
+class StageStats:
+    """Aggregated measurements of one instrumented stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.min_s = float('inf')
+        self.max_s = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.rows = 0
+        self.bytes_allocated = 0
+        self.max_bytes_allocated = 0
+
+    def record(self, seconds, rows=None, allocated=None, error=False):
+        self.calls += 1
+        self.errors += error
+        self.total_s += seconds
+        self.min_s = min(self.min_s, seconds)
+        self.max_s = max(self.max_s, seconds)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+        if rows is not None:
+            self.rows += rows
+        if allocated is not None:
+            self.bytes_allocated += allocated
+            self.max_bytes_allocated = max(self.max_bytes_allocated, allocated)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Call and error counts, latency summary and histogram, rows and allocations
+        """
+        labels = [f'<={bound}ms' for bound in LATENCY_BUCKETS_MS] + [f'>{LATENCY_BUCKETS_MS[-1]}ms']
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_s': self.total_s,
+            'mean_s': self.total_s / self.calls if self.calls else 0.0,
+            'min_s': self.min_s if self.calls else 0.0,
+            'max_s': self.max_s,
+            'latency_histogram': dict(zip(labels, self.histogram)),
+            'rows': self.rows,
+            'rows_per_s': self.rows / self.total_s if self.total_s else 0.0,
+            'bytes_allocated': self.bytes_allocated,
+            'max_bytes_allocated': self.max_bytes_allocated,
+        }
+
+def enable(trace_allocations=False, profile=False):
+    """
+    Start recording instrumented calls.
+
+    Args:
+        trace_allocations (bool, optional): Measure the peak bytes allocated by each call
+            with tracemalloc (slows calls down noticeably). Defaults to False.
+        profile (bool, optional): Run cProfile until disable() for a dump with
+            write_report. Defaults to False.
+    """
+    global _ENABLED, _TRACE_ALLOCATIONS, _STARTED_TRACEMALLOC, _PROFILER, _SNAPSHOT
+
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _STARTED_TRACEMALLOC = True
+    if profile:
+        _PROFILER = cProfile.Profile()
+        _PROFILER.enable()
+    _SNAPSHOT = None
+    _TRACE_ALLOCATIONS = trace_allocations
+    _ENABLED = True
+
+def disable():
+    """Stop recording; collected stats, the profile and an allocation snapshot are kept for reporting."""
+    global _ENABLED, _TRACE_ALLOCATIONS, _STARTED_TRACEMALLOC, _SNAPSHOT
+
+    _ENABLED = False
+    _TRACE_ALLOCATIONS = False
+    if _PROFILER is not None:
+        _PROFILER.disable()
+    if _STARTED_TRACEMALLOC:
+        _SNAPSHOT = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        _STARTED_TRACEMALLOC = False
+
+def is_enabled():
+    return _ENABLED
+
+def reset():
+    """Drop all collected stats, the profile and the allocation snapshot."""
+    global _PROFILER, _SNAPSHOT
+
+    with _LOCK:
+        _STATS.clear()
+    if _PROFILER is not None and not _ENABLED:
+        _PROFILER = None
+    _SNAPSHOT = None
+
+def _record(name, seconds, rows, allocated, error):
+    with _LOCK:
+        stats = _STATS.get(name)
+        if stats is None:
+            stats = _STATS[name] = StageStats(name)
+        stats.record(seconds, rows, allocated, error)
+
+def _count_rows(value):
+    """Row count of a frame, array or record sequence; None for anything else."""
+    shape = getattr(value, 'shape', None)
+    if shape:
+        return shape[0]
+    if isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
+        return len(value)
+    return None
+
+def _allocation_enter():
+    stack = getattr(_ALLOCATIONS, 'stack', None)
+    if stack is None:
+        stack = _ALLOCATIONS.stack = []
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        # Keep the enclosing measurement's peak before it is reset for this one
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    entry = [current, current]
+    stack.append(entry)
+    return entry
+
+def _allocation_exit(entry):
+    stack = _ALLOCATIONS.stack
+    peak = max(entry[1], tracemalloc.get_traced_memory()[1])
+    stack.pop()
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    return peak - entry[0]
+
+class _Stage:
+    """Context manager that records one call of a named stage."""
+
+    __slots__ = ('name', 'rows', '_active', '_start', '_allocation')
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        self._active = _ENABLED
+        if self._active:
+            self._allocation = _allocation_enter() if _TRACE_ALLOCATIONS and tracemalloc.is_tracing() else None
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._active:
+            elapsed = time.perf_counter() - self._start
+            allocated = _allocation_exit(self._allocation) if self._allocation is not None else None
+            _record(self.name, elapsed, self.rows, allocated, exc_type is not None)
+        return False
+
+def stage(name, rows=None):
+    """
+    Record a block of code as a named stage.
+
+        with instrumentation.stage('dashboard.refresh', rows=len(df)) as span:
+            ...
+            span.rows = len(result)  # Or set the row count once it is known
+
+    Args:
+        name (str): Stage name in the report
+        rows (int, optional): Rows processed by the block
+
+    Returns:
+        A context manager; does nothing but a flag check while instrumentation is disabled
+    """
+    return _Stage(name, rows)
+
+def _instrument_generator(func, name):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        if not _ENABLED:
+            yield from generator
+            return
+
+        # Time only the work done inside the generator, and count the rows it yields
+        elapsed = 0.0
+        rows = 0
+        error = False
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    break
+                except BaseException:
+                    elapsed += time.perf_counter() - start
+                    error = True
+                    raise
+                elapsed += time.perf_counter() - start
+                rows += _count_rows(item) or 0
+                yield item
+        finally:
+            generator.close()
+            _record(name, elapsed, rows, None, error)
+    return wrapper
+
+def instrument(func=None, *, name=None):
+    """
+    Decorator recording every call of a function while instrumentation is enabled.
+
+    Each call adds to the function's call count, latency histogram, rows processed
+    (the length of the first argument, or of the result when there are no arguments)
+    and, with trace_allocations, the peak bytes it allocated. Generator functions are
+    recorded once per generator, with the time spent producing items and the rows of
+    the items yielded (allocations are not traced for them). While disabled the only
+    cost is a flag check.
+
+    Args:
+        func (callable): The function to wrap
+        name (str, optional): Stage name in the report. Defaults to module.qualname.
+
+    Returns:
+        callable: The wrapped function
+    """
+    if func is None:
+        return functools.partial(instrument, name=name)
+    name = name or f'{func.__module__}.{func.__qualname__}'
+
+    if inspect.isgeneratorfunction(func):
+        return _instrument_generator(func, name)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _ENABLED:
+            return func(*args, **kwargs)
+        with _Stage(name) as span:
+            result = func(*args, **kwargs)
+            span.rows = _count_rows(args[0] if args else result)
+        return result
+    return wrapper
+
+def report():
+    """
+    Snapshot of everything recorded so far.
+
+    Returns:
+        dict: 'enabled', 'trace_allocations' and per-stage stats under 'stages',
+            sorted by total time (slowest first)
+    """
+    with _LOCK:
+        stages = sorted(_STATS.values(), key=lambda stats: stats.total_s, reverse=True)
+        return {
+            'enabled': _ENABLED,
+            'trace_allocations': _TRACE_ALLOCATIONS or _SNAPSHOT is not None,
+            'stages': {stats.name: stats.to_dict() for stats in stages},
+        }
+
+def write_report(path, profile_path=None, tracemalloc_path=None):
+    """
+    Write the report as JSON, optionally with cProfile and tracemalloc dumps.
+
+    Args:
+        path (str): JSON report path
+        profile_path (str, optional): Where to dump cProfile stats (readable with pstats);
+            needs enable(profile=True)
+        tracemalloc_path (str, optional): Where to dump a tracemalloc snapshot (readable with
+            tracemalloc.Snapshot.load); needs enable(trace_allocations=True)
+
+    Returns:
+        dict: The report that was written
+    """
+    data = report()
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+    if profile_path is not None:
+        if _PROFILER is None:
+            raise RuntimeError("No profile recorded; call enable(profile=True) first")
+        _PROFILER.dump_stats(profile_path)
+
+    if tracemalloc_path is not None:
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else _SNAPSHOT
+        if snapshot is None:
+            raise RuntimeError("No allocations traced; call enable(trace_allocations=True) first")
+        snapshot.dump(tracemalloc_path)
+
+    return data
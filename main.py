@@ -4,36 +4,44 @@
 #Assignment: Lab 10
 import music
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-def main():
-    # Get music data
-    data = music.get_music()
-    print(f"Loaded {len(data)} music records")
-    
-    # Print a sample record to see its structure
-    print("\nSample music record structure:")
-    sample = data[0]
-    print(f"Artist name: {sample['artist']['name']}")
-    print(f"Song title: {sample['song']['title']}")
-    print(f"Year: {sample['song']['year']}")
-    print(f"Popularity: {sample['song']['hotttnesss']:.2f}")
-    
-    # Extract years and popularity data
-    years = []
-    popularity = []
-    
-    for record in data:
-        year = record['song']['year']
-        pop = record['song']['hotttnesss']
-        if year is not None and pop is not None:
-            years.append(year)
-            popularity.append(pop * 100)  # Scale to 0-100
-    
+
+# Create key mapping
+key_mapping = {
+    0: 'C', 1: 'C#', 2: 'D', 3: 'D#', 4: 'E', 5: 'F',
+    6: 'F#', 7: 'G', 8: 'G#', 9: 'A', 10: 'A#', 11: 'B'
+}
+
+def popularity_by_year(data):
+    """
+    Average song popularity (0-100) per year.
+
+    Args:
+        data (music.MusicColumns): The music dataset
+
+    Returns:
+        tuple: (DataFrame with Year and Popularity columns, number of songs used)
+    """
+    # Records with both a year and a popularity value (missing values are NaN)
+    years = data.columns['song.year']
+    popularity = data.columns['song.hotttnesss']
+    valid = ~np.isnan(years) & ~np.isnan(popularity)
+
     # Create a dataframe and group by year
-    df = pd.DataFrame({'Year': years, 'Popularity': popularity})
+    df = pd.DataFrame({'Year': years[valid].astype(np.int64), 'Popularity': popularity[valid] * 100})  # Scale to 0-100
     df = df.groupby('Year').mean().reset_index()
-    
+    return df, int(valid.sum())
+
+def plot_popularity_by_year(df, path='popularity_by_year.png'):
+    """
+    Plot average popularity over time and save it.
+
+    Args:
+        df (pandas.DataFrame): Result of popularity_by_year
+        path (str, optional): Where to save the figure. Defaults to 'popularity_by_year.png'.
+    """
+    import matplotlib.pyplot as plt
+
     # Plot popularity over time
     plt.figure(figsize=(12, 6))
     plt.plot(df['Year'], df['Popularity'], marker='o', linewidth=2)
@@ -41,37 +49,42 @@ def main():
     plt.xlabel("Year", fontsize=12)
     plt.ylabel("Popularity (0-100)", fontsize=12)
     plt.grid(True, alpha=0.3)
-    
+
     # Add vertical lines for decades
     for decade in range(1960, 2030, 10):
         if decade in df['Year'].values:
             plt.axvline(x=decade, color='gray', linestyle='--', alpha=0.5)
-    
-    # Clean the data by removing outliers
-    df_clean = df[(df['Popularity'] > 0) & (df['Popularity'] <= 100)]
-    
+
     # Save the figure
     plt.tight_layout()
-    plt.savefig('popularity_by_year.png')
-    print("Plot saved as 'popularity_by_year.png'")
-    
-    # Key distribution analysis
-    # Create key mapping
-    key_mapping = {
-        0: 'C', 1: 'C#', 2: 'D', 3: 'D#', 4: 'E', 5: 'F',
-        6: 'F#', 7: 'G', 8: 'G#', 9: 'A', 10: 'A#', 11: 'B'
-    }
-    
-    # Extract keys
-    keys = []
-    for record in data:
-        key = record['song'].get('key')
-        if key is not None and key in key_mapping:
-            keys.append(key_mapping[key])
-    
-    # Count keys
-    key_counts = pd.Series(keys).value_counts().sort_index()
-    
+    plt.savefig(path)
+
+def key_distribution(data):
+    """
+    Number of songs per musical key.
+
+    Args:
+        data (music.MusicColumns): The music dataset
+
+    Returns:
+        pandas.Series: Song count per key name, sorted by key name
+    """
+    # Count the codes of known keys, then name them
+    keys = data.columns['song.key']
+    codes = keys[np.isin(keys, list(key_mapping))].astype(np.int64)
+    names = np.array([key_mapping[code] for code in range(len(key_mapping))], dtype=object)
+    return pd.Series(names[codes]).value_counts().sort_index()
+
+def plot_key_distribution(key_counts, path='key_distribution.png'):
+    """
+    Plot the key distribution and save it.
+
+    Args:
+        key_counts (pandas.Series): Result of key_distribution
+        path (str, optional): Where to save the figure. Defaults to 'key_distribution.png'.
+    """
+    import matplotlib.pyplot as plt
+
     # Plot key distribution
     plt.figure(figsize=(10, 6))
     plt.bar(key_counts.index, key_counts.values, color='skyblue')
@@ -79,26 +92,52 @@ def main():
     plt.xlabel('Musical Key', fontsize=12)
     plt.ylabel('Number of Songs', fontsize=12)
     plt.grid(axis='y', alpha=0.3)
-    plt.savefig('key_distribution.png')
+    plt.savefig(path)
+
+def main():
+    # Get music data
+    data = music.get_music()
+    print(f"Loaded {len(data)} music records")
+
+    # Print a sample record to see its structure
+    print("\nSample music record structure:")
+    sample = data[0]
+    print(f"Artist name: {sample['artist']['name']}")
+    print(f"Song title: {sample['song']['title']}")
+    print(f"Year: {sample['song']['year']}")
+    print(f"Popularity: {sample['song']['hotttnesss']:.2f}")
+
+    df, n_songs = popularity_by_year(data)
+
+    # Clean the data by removing outliers
+    df_clean = df[(df['Popularity'] > 0) & (df['Popularity'] <= 100)]
+
+    plot_popularity_by_year(df, 'popularity_by_year.png')
+    print("Plot saved as 'popularity_by_year.png'")
+
+    # Key distribution analysis
+    key_counts = key_distribution(data)
+
+    plot_key_distribution(key_counts, 'key_distribution.png')
     print("Key distribution saved as 'key_distribution.png'")
-    
+
     # Print data insights
     print("\nData Insights:")
-    print(f"1. Analyzed {len(years)} songs with valid year and popularity data")
-    
+    print(f"1. Analyzed {n_songs} songs with valid year and popularity data")
+
     # Most popular year
     most_popular_year = df.loc[df['Popularity'].idxmax()]
     print(f"2. The most popular year for music was {int(most_popular_year['Year'])} with an average popularity of {most_popular_year['Popularity']:.2f}")
-    
+
     # Most common key
     most_common_key = key_counts.idxmax()
     print(f"3. The most common musical key is {most_common_key} with {key_counts[most_common_key]} songs")
-    
+
     # Trend analysis
     early_years = df[df['Year'] < 1990]['Popularity'].mean()
     later_years = df[df['Year'] >= 1990]['Popularity'].mean()
-    
+
     trend = "increased" if later_years > early_years else "decreased"
     print(f"4. Song popularity has {trend} over time. Average popularity before 1990: {early_years:.2f}, after 1990: {later_years:.2f}")
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,101 +1,120 @@
-import pandas as pd
 import numpy as np
 import random
 import os
-__all__ = ['get_music']
-def generate_sample_music_data(n_records=200):
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections.abc import Mapping, Sequence
+import instrumentation
+import dataset_cache
+__all__ = ['get_music', 'get_music_columns', 'generate_music_columns', 'ingest']
+
+# Sample artists
+_ARTISTS = [
+    "The Beatles", "Queen", "Michael Jackson", "Madonna", "Beyoncé",
+    "Elvis Presley", "Taylor Swift", "Adele", "Ed Sheeran", "Rihanna",
+    "Coldplay", "Kanye West", "Lady Gaga", "Bruno Mars", "Ariana Grande",
+    "Justin Bieber", "Katy Perry", "Eminem", "Drake", "Billie Eilish"
+]
+
+# Sample terms (genres)
+_TERMS = [
+    "rock", "pop", "hip hop", "r&b", "soul", "electronic", "jazz", 
+    "blues", "country", "metal", "classical", "reggae", "folk", 
+    "indie", "dance", "punk", "funk", "disco"
+]
+
+# Sample song titles for each artist
+_SONG_TITLES = {
+    "The Beatles": ["Hey Jude", "Let It Be", "Yesterday", "Come Together"],
+    "Queen": ["Bohemian Rhapsody", "We Will Rock You", "Radio Ga Ga"],
+    "Michael Jackson": ["Thriller", "Billie Jean", "Beat It"],
+    "Madonna": ["Like a Prayer", "Material Girl", "Vogue"],
+    "Beyoncé": ["Crazy in Love", "Single Ladies", "Halo"],
+    "Elvis Presley": ["Jailhouse Rock", "Can't Help Falling in Love", "Suspicious Minds"],
+    "Taylor Swift": ["Shake It Off", "Blank Space", "Love Story"],
+    "Adele": ["Hello", "Rolling in the Deep", "Someone Like You"],
+    "Ed Sheeran": ["Shape of You", "Perfect", "Thinking Out Loud"],
+    "Rihanna": ["Umbrella", "Diamonds", "Work"],
+    "Coldplay": ["Viva la Vida", "Fix You", "Paradise"],
+    "Kanye West": ["Stronger", "Gold Digger", "Power"],
+    "Lady Gaga": ["Bad Romance", "Poker Face", "Born This Way"],
+    "Bruno Mars": ["Uptown Funk", "Just the Way You Are", "24K Magic"],
+    "Ariana Grande": ["Thank U, Next", "7 Rings", "No Tears Left to Cry"],
+    "Justin Bieber": ["Sorry", "Love Yourself", "What Do You Mean?"],
+    "Katy Perry": ["Roar", "Firework", "Dark Horse"],
+    "Eminem": ["Lose Yourself", "The Real Slim Shady", "Not Afraid"],
+    "Drake": ["Hotline Bling", "God's Plan", "One Dance"],
+    "Billie Eilish": ["Bad Guy", "Lovely", "Ocean Eyes"]
+}
+
+# Decade distribution for song years
+_DECADES = [1960, 1970, 1980, 1990, 2000, 2010, 2020]
+_DECADE_WEIGHTS = [0.05, 0.1, 0.15, 0.2, 0.25, 0.2, 0.05]
+
+def generate_sample_music_data(n_records=200, batched=False):
     """
     Generate sample music data for demonstration purposes.
     
     Args:
         n_records (int): Number of records to generate
+        batched (bool, optional): If True, draw every field as a whole array with
+            generate_sample_music_columns and convert the result to records. This is
+            much faster for large datasets but produces different random values than
+            the per-record loop. Defaults to False.
         
     Returns:
         list: A list of dictionaries containing sample music data
     """
-    # Set random seed for reproducibility
-    np.random.seed(42)
-    random.seed(42)
-    
-    # Sample artists
-    artists = [
-        "The Beatles", "Queen", "Michael Jackson", "Madonna", "Beyoncé",
-        "Elvis Presley", "Taylor Swift", "Adele", "Ed Sheeran", "Rihanna",
-        "Coldplay", "Kanye West", "Lady Gaga", "Bruno Mars", "Ariana Grande",
-        "Justin Bieber", "Katy Perry", "Eminem", "Drake", "Billie Eilish"
-    ]
-    
-    # Sample terms (genres)
-    terms = [
-        "rock", "pop", "hip hop", "r&b", "soul", "electronic", "jazz", 
-        "blues", "country", "metal", "classical", "reggae", "folk", 
-        "indie", "dance", "punk", "funk", "disco"
-    ]
-    
-    # Sample song titles for each artist
-    song_titles = {
-        "The Beatles": ["Hey Jude", "Let It Be", "Yesterday", "Come Together"],
-        "Queen": ["Bohemian Rhapsody", "We Will Rock You", "Radio Ga Ga"],
-        "Michael Jackson": ["Thriller", "Billie Jean", "Beat It"],
-        "Madonna": ["Like a Prayer", "Material Girl", "Vogue"],
-        "Beyoncé": ["Crazy in Love", "Single Ladies", "Halo"],
-        "Elvis Presley": ["Jailhouse Rock", "Can't Help Falling in Love", "Suspicious Minds"],
-        "Taylor Swift": ["Shake It Off", "Blank Space", "Love Story"],
-        "Adele": ["Hello", "Rolling in the Deep", "Someone Like You"],
-        "Ed Sheeran": ["Shape of You", "Perfect", "Thinking Out Loud"],
-        "Rihanna": ["Umbrella", "Diamonds", "Work"],
-        "Coldplay": ["Viva la Vida", "Fix You", "Paradise"],
-        "Kanye West": ["Stronger", "Gold Digger", "Power"],
-        "Lady Gaga": ["Bad Romance", "Poker Face", "Born This Way"],
-        "Bruno Mars": ["Uptown Funk", "Just the Way You Are", "24K Magic"],
-        "Ariana Grande": ["Thank U, Next", "7 Rings", "No Tears Left to Cry"],
-        "Justin Bieber": ["Sorry", "Love Yourself", "What Do You Mean?"],
-        "Katy Perry": ["Roar", "Firework", "Dark Horse"],
-        "Eminem": ["Lose Yourself", "The Real Slim Shady", "Not Afraid"],
-        "Drake": ["Hotline Bling", "God's Plan", "One Dance"],
-        "Billie Eilish": ["Bad Guy", "Lovely", "Ocean Eyes"]
-    }
+    if batched:
+        return columns_to_records(generate_sample_music_columns(n_records))
+    
+    # Use a private seeded generator for reproducibility, leaving the global random state alone
+    rng = random.Random(42)
+    
+    artists = _ARTISTS
+    terms = _TERMS
+    song_titles = _SONG_TITLES
     
     # Generate data
     music_data = []
     
     for _ in range(n_records):
         # Choose a random artist
-        artist_name = random.choice(artists)
+        artist_name = rng.choice(artists)
         
         # Generate artist data
-        artist_hotttnesss = random.uniform(0, 1)
-        artist_familiarity = random.uniform(0, 1)
-        artist_id = f"AR{random.randint(10000, 99999)}"
+        artist_hotttnesss = rng.uniform(0, 1)
+        artist_familiarity = rng.uniform(0, 1)
+        artist_id = f"AR{rng.randint(10000, 99999)}"
         
         # Generate location data (some might be None)
-        has_location = random.random() > 0.2
+        has_location = rng.random() > 0.2
         if has_location:
-            latitude = random.uniform(-90, 90)
-            longitude = random.uniform(-180, 180)
+            latitude = rng.uniform(-90, 90)
+            longitude = rng.uniform(-180, 180)
         else:
             latitude = None
             longitude = None
         
         # Generate artist terms
-        artist_term_count = random.randint(1, 5)
-        artist_terms = random.sample(terms, artist_term_count)
-        artist_terms_freq = [random.uniform(0, 1) for _ in range(artist_term_count)]
+        artist_term_count = rng.randint(1, 5)
+        artist_terms = rng.sample(terms, artist_term_count)
+        artist_terms_freq = [rng.uniform(0, 1) for _ in range(artist_term_count)]
         
         # Generate song data
-        song_title = random.choice(song_titles[artist_name])
-        song_hotttnesss = random.uniform(0, 1)
-        song_duration = random.uniform(120, 400)  # 2-6.5 minutes
-        song_key = random.randint(0, 11)  # 0=C, 1=C#, etc.
-        song_tempo = random.uniform(60, 200)  # BPM
-        song_time_signature = random.choice([3, 4, 5, 6])
-        song_loudness = random.uniform(-15, -1)  # dB
+        song_title = rng.choice(song_titles[artist_name])
+        song_hotttnesss = rng.uniform(0, 1)
+        song_duration = rng.uniform(120, 400)  # 2-6.5 minutes
+        song_key = rng.randint(0, 11)  # 0=C, 1=C#, etc.
+        song_tempo = rng.uniform(60, 200)  # BPM
+        song_time_signature = rng.choice([3, 4, 5, 6])
+        song_loudness = rng.uniform(-15, -1)  # dB
         
         # Generate year (with some distribution over decades)
-        decades = [1960, 1970, 1980, 1990, 2000, 2010, 2020]
-        weights = [0.05, 0.1, 0.15, 0.2, 0.25, 0.2, 0.05]
-        decade = random.choices(decades, weights=weights)[0]
-        year = decade + random.randint(0, 9)
+        decade = rng.choices(_DECADES, weights=_DECADE_WEIGHTS)[0]
+        year = decade + rng.randint(0, 9)
         
         # Create the record
         record = {
@@ -107,35 +126,35 @@ def generate_sample_music_data(n_records=200):
                 "longitude": longitude,
                 "location": "unknown",  # We don't have real location names
                 "name": artist_name,
-                "similar": random.uniform(0, 1),
+                "similar": rng.uniform(0, 1),
                 "terms": artist_terms[0] if artist_terms else "unknown",
                 "terms_freq": artist_terms_freq[0] if artist_terms_freq else 0
             },
             "release": {
-                "id": random.randint(10000, 99999),
-                "name": random.randint(10000, 99999)
+                "id": rng.randint(10000, 99999),
+                "name": rng.randint(10000, 99999)
             },
             "song": {
                 "artist_mbtags": [],
                 "artist_mbtags_count": [],
-                "bars_confidence": random.uniform(0, 1),
+                "bars_confidence": rng.uniform(0, 1),
                 "bars_start": [],
-                "beats_confidence": random.uniform(0, 1),
+                "beats_confidence": rng.uniform(0, 1),
                 "beats_start": [],
                 "duration": song_duration,
-                "end_of_fade_in": random.uniform(0, 3),
+                "end_of_fade_in": rng.uniform(0, 3),
                 "hotttnesss": song_hotttnesss,
                 "key": song_key,
-                "key_confidence": random.uniform(0, 1),
+                "key_confidence": rng.uniform(0, 1),
                 "loudness": song_loudness,
-                "mode": random.randint(0, 1),
-                "mode_confidence": random.uniform(0, 1),
-                "start_of_fade_out": song_duration - random.uniform(0, 10),
+                "mode": rng.randint(0, 1),
+                "mode_confidence": rng.uniform(0, 1),
+                "start_of_fade_out": song_duration - rng.uniform(0, 10),
                 "tatums_confidence": [],
                 "tatums_start": [],
                 "tempo": song_tempo,
                 "time_signature": song_time_signature,
-                "time_signature_confidence": random.uniform(0, 1),
+                "time_signature_confidence": rng.uniform(0, 1),
                 "title": song_title,
                 "year": year
             }
@@ -144,24 +163,653 @@ def generate_sample_music_data(n_records=200):
         music_data.append(record)
     
     return music_data
-# Cache for the dataset
-_DATASET = None
-def get_music():
+@functools.lru_cache(maxsize=None)
+def _sample_categories():
+    """
+    Values the codes of each generated string field index into.
+    
+    Built once per process and shared by every draw, so the arrays are read-only.
+    
+    Returns:
+        dict: An array of values per string field
+    """
+    categories = {
+        "artist.id": np.char.add("AR", np.arange(10000, 100000).astype(str)),
+        "artist.location": np.array(["unknown"], dtype=object),
+        "artist.name": np.array(_ARTISTS, dtype=object),
+        "artist.terms": np.array(_TERMS, dtype=object),
+        "song.title": np.array([title for name in _ARTISTS for title in _SONG_TITLES[name]], dtype=object),
+    }
+    for values in categories.values():
+        values.flags.writeable = False
+    return categories
+
+def _draw_music_columns(n_records, seed):
+    """
+    Draw every field of the sample data, leaving string fields as integer codes.
+    
+    Returns:
+        tuple: (columns, categories) where columns maps 'section.field' names to NumPy
+            arrays and, for each string field, categories holds the shared read-only
+            array of values that field's codes index into
+    """
+    rng = np.random.default_rng(seed)
+    n = int(n_records)
+    
+    # Choose artists and a title from each artist's own song list
+    artist_codes = rng.integers(0, len(_ARTISTS), size=n)
+    title_counts = np.array([len(_SONG_TITLES[name]) for name in _ARTISTS])
+    title_offsets = np.concatenate(([0], np.cumsum(title_counts)[:-1]))
+    title_codes = title_offsets[artist_codes] + (rng.random(n) * title_counts[artist_codes]).astype(np.int64)
+    
+    # Generate location data, masking roughly 20% of the rows as missing
+    has_location = rng.random(n) > 0.2
+    latitude = np.where(has_location, rng.uniform(-90, 90, n), np.nan)
+    longitude = np.where(has_location, rng.uniform(-180, 180, n), np.nan)
+    
+    # Generate year with the same weighted distribution over decades
+    decades = rng.choice(np.array(_DECADES), size=n, p=_DECADE_WEIGHTS)
+    year = decades + rng.integers(0, 10, size=n)
+    
+    duration = rng.uniform(120, 400, n)  # 2-6.5 minutes
+    
+    columns = {
+        "artist.familiarity": rng.random(n),
+        "artist.hotttnesss": rng.random(n),
+        "artist.id": rng.integers(10000, 100000, size=n) - 10000,
+        "artist.latitude": latitude,
+        "artist.longitude": longitude,
+        "artist.location": np.zeros(n, dtype=np.int64),
+        "artist.name": artist_codes,
+        "artist.similar": rng.random(n),
+        "artist.terms": rng.integers(0, len(_TERMS), size=n),
+        "artist.terms_freq": rng.random(n),
+        "release.id": rng.integers(10000, 100000, size=n),
+        "release.name": rng.integers(10000, 100000, size=n),
+        "song.bars_confidence": rng.random(n),
+        "song.beats_confidence": rng.random(n),
+        "song.duration": duration,
+        "song.end_of_fade_in": rng.uniform(0, 3, n),
+        "song.hotttnesss": rng.random(n),
+        "song.key": rng.integers(0, 12, size=n),  # 0=C, 1=C#, etc.
+        "song.key_confidence": rng.random(n),
+        "song.loudness": rng.uniform(-15, -1, n),  # dB
+        "song.mode": rng.integers(0, 2, size=n),
+        "song.mode_confidence": rng.random(n),
+        "song.start_of_fade_out": duration - rng.uniform(0, 10, n),
+        "song.tempo": rng.uniform(60, 200, n),  # BPM
+        "song.time_signature": rng.choice(np.array([3, 4, 5, 6]), size=n),
+        "song.time_signature_confidence": rng.random(n),
+        "song.title": title_codes,
+        "song.year": year,
+    }
+    return columns, _sample_categories()
+
+def generate_sample_music_columns(n_records=200, seed=42):
+    """
+    Generate sample music data as whole NumPy columns instead of one record at a time.
+    
+    Every field is drawn in a single vectorized call from a seeded
+    np.random.Generator, so the global random state is left untouched.
+    
+    Args:
+        n_records (int): Number of records to generate
+        seed (int, optional): Seed for the random generator. Defaults to 42.
+        
+    Returns:
+        dict: A mapping of 'section.field' names (e.g. 'song.year') to NumPy arrays.
+            Missing artist locations are stored as NaN in 'artist.latitude' and
+            'artist.longitude'.
+    """
+    columns, categories = _draw_music_columns(n_records, seed)
+    for name, values in categories.items():
+        columns[name] = values[columns[name]]
+    return columns
+
+# Fields of the nested song record that are always empty lists in the sample data
+_EMPTY_SONG_LISTS = [
+    "artist_mbtags", "artist_mbtags_count", "bars_start", "beats_start",
+    "tatums_confidence", "tatums_start"
+]
+
+def columns_to_records(columns):
+    """
+    Convert generated columns back into the list-of-nested-dicts record format.
+    
+    Args:
+        columns (dict): Columns as returned by generate_sample_music_columns
+        
+    Returns:
+        list: A list of dictionaries with 'artist', 'release' and 'song' sections
+    """
+    # Convert each column to Python objects once, with NaN locations as None
+    values = {}
+    for name, column in columns.items():
+        values[name] = column.tolist()
+    for name in ("artist.latitude", "artist.longitude"):
+        missing = np.isnan(columns[name])
+        values[name] = [None if m else v for m, v in zip(missing.tolist(), values[name])]
+    
+    sections = {}
+    for name in values:
+        section, field = name.split(".", 1)
+        sections.setdefault(section, []).append(field)
+    
+    music_data = []
+    for i in range(len(values["song.year"])):
+        record = {}
+        for section, fields in sections.items():
+            record[section] = {field: values[f"{section}.{field}"][i] for field in fields}
+        for field in _EMPTY_SONG_LISTS:
+            record["song"][field] = []
+        music_data.append(record)
+    
+    return music_data
+class MusicColumns(Sequence):
+    """
+    Columnar in-memory store for the music dataset.
+    
+    Each 'section.field' (e.g. 'song.year') is kept as one typed NumPy array.
+    Integer columns are downcast to the smallest fitting dtype and string columns
+    are dictionary-encoded as integer codes into a shared array of categories.
+    Indexing the store returns a lazy record view, so code written against the
+    list-of-dicts format (record['song']['year']) keeps working.
+    
+    append() publishes the grown columns, categories and length together in one
+    assignment, so each read of .columns is self-consistent; code that reads the
+    store while another thread appends should work on snapshot().
+    """
+    
+    def __init__(self, columns, categories=None):
+        """
+        Args:
+            columns (dict): Mapping of 'section.field' names to NumPy arrays. For
+                dictionary-encoded columns these are the integer codes.
+            categories (dict, optional): Mapping of encoded column names to the
+                array of their distinct string values
+        """
+        # (columns, categories, length), replaced as a whole by append()
+        self._state = (columns, categories or {}, len(next(iter(columns.values()))) if columns else 0)
+        # Backing arrays with spare capacity for append(); columns are views into them
+        self._buffers = dict(columns)
+        self._append_lock = threading.Lock()
+        self._sections = {}
+        for name in columns:
+            section, field = name.split(".", 1)
+            self._sections.setdefault(section, []).append(field)
+    
+    @property
+    def columns(self):
+        """dict: 'section.field' name -> NumPy array (integer codes for encoded columns)"""
+        return self._state[0]
+    
+    @property
+    def categories(self):
+        """dict: Encoded column name -> array of its distinct string values"""
+        return self._state[1]
+    
+    def snapshot(self):
+        """
+        Get a store fixed at the current records.
+        
+        The snapshot shares the column arrays (no data is copied) and does not see
+        records appended to this store later.
+        
+        Returns:
+            MusicColumns: The current records
+        """
+        columns, categories, _ = self._state
+        return MusicColumns(dict(columns), dict(categories))
+    
+    @classmethod
+    def from_columns(cls, columns, categories=None):
+        """
+        Build a store from plain columns such as generate_sample_music_columns returns.
+        
+        Args:
+            columns (dict): Mapping of 'section.field' names to NumPy arrays
+            categories (dict, optional): For string columns given as integer codes, the
+                array of values the codes index into. These are encoded exactly like
+                the equivalent string columns, without materializing the strings.
+            
+        Returns:
+            MusicColumns: The encoded columnar store
+        """
+        encoded = {}
+        encoded_categories = {}
+        for name, column in columns.items():
+            column = np.asarray(column)
+            if categories and name in categories:
+                # Keep the values actually used, sorted, and remap the codes onto them
+                lookup = np.asarray(categories[name])
+                used = np.flatnonzero(np.bincount(column, minlength=len(lookup)))
+                values, inverse = np.unique(lookup[used].astype(str), return_inverse=True)
+                remap = np.zeros(len(lookup), dtype=np.int64)
+                remap[used] = inverse
+                encoded_categories[name] = values.astype(object)
+                encoded[name] = remap[column].astype(np.min_scalar_type(max(len(values) - 1, 0)))
+            elif column.dtype.kind in ("O", "U", "S"):
+                # Dictionary-encode strings as small integer codes
+                values, codes = np.unique(column.astype(str), return_inverse=True)
+                encoded_categories[name] = values.astype(object)
+                encoded[name] = codes.astype(np.min_scalar_type(max(len(values) - 1, 0)))
+            elif column.dtype.kind in ("i", "u") and len(column):
+                # Downcast integers to the smallest dtype that holds their range
+                dtype = np.result_type(np.min_scalar_type(column.min()), np.min_scalar_type(column.max()))
+                encoded[name] = column.astype(dtype)
+            else:
+                encoded[name] = column
+        return cls(encoded, encoded_categories)
+    
+    @classmethod
+    def concat(cls, stores):
+        """
+        Join stores end to end into a new store, merging their string categories.
+        
+        Args:
+            stores (list): MusicColumns stores with the same columns
+            
+        Returns:
+            MusicColumns: The records of every store, in order
+        """
+        first = stores[0]
+        columns = {}
+        categories = {}
+        for name in first.columns:
+            if name not in first.categories:
+                columns[name] = np.concatenate([store.columns[name] for store in stores])
+                continue
+            
+            # Give every distinct value one code, in order of first appearance
+            positions = {}
+            parts = []
+            for store in stores:
+                mapping = np.array([positions.setdefault(value, len(positions)) for value in store.categories[name]],
+                                   dtype=np.int64)
+                parts.append(mapping[store.columns[name]] if len(mapping) else store.columns[name])
+            categories[name] = np.array(list(positions), dtype=object)
+            columns[name] = np.concatenate(parts).astype(np.min_scalar_type(max(len(positions) - 1, 0)))
+        return cls(columns, categories)
+    
+    def __len__(self):
+        return self._state[2]
+    
+    def __getitem__(self, index):
+        length = self._state[2]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(length))]
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("record index out of range")
+        return _RecordView(self, index)
+    
+    @property
+    def nbytes(self):
+        """Total number of bytes held by the columns and their categories."""
+        total = sum(column.nbytes for column in self.columns.values())
+        for values in self.categories.values():
+            total += values.nbytes + sum(len(value) for value in values)
+        return total
+    
+    def column(self, name):
+        """
+        Get a column with any dictionary encoding decoded.
+        
+        Args:
+            name (str): Column name such as 'artist.name' or 'song.year'
+            
+        Returns:
+            numpy.ndarray: The decoded column
+        """
+        if name in self.categories:
+            return self.categories[name][self.columns[name]]
+        return self.columns[name]
+    
+    def value(self, name, index):
+        """
+        Get a single value as a plain Python object.
+        
+        Args:
+            name (str): Column name such as 'song.year'
+            index (int): Record index
+            
+        Returns:
+            object: The value, with missing floats returned as None
+        """
+        if name in self.categories:
+            return self.categories[name][self.columns[name][index]]
+        value = self.columns[name][index].item()
+        if isinstance(value, float) and value != value:
+            return None
+        return value
+    
+    def append(self, other):
+        """
+        Append another store's records in place.
+        
+        Columns grow into buffers with doubling capacity, so appending many small
+        batches costs amortized O(batch size). New string values are added to the
+        existing categories and the incoming codes are remapped to them. Concurrent
+        appends are serialized, and readers see either all or none of a batch.
+        
+        Args:
+            other (MusicColumns): Records with the same columns, each text or numeric
+                like this store's
+        
+        Raises:
+            ValueError: If the columns or their kinds differ; the store is left unchanged
+        """
+        other_columns, other_categories, other_length = other._state
+        with self._append_lock:
+            columns, categories, length = self._state
+            if set(other_columns) != set(columns):
+                raise ValueError("Appended records must have the same columns as the store")
+            # Check every column before changing any, so a bad batch leaves the store intact
+            for name in columns:
+                if (name in categories) != (name in other_categories):
+                    raise ValueError(f"Column '{name}' is {'text' if name in categories else 'numeric'} in the store "
+                                     f"but not in the appended records")
+                if name not in categories and other_columns[name].dtype.kind not in "biuf":
+                    raise ValueError(f"Column '{name}' must be numeric, got dtype {other_columns[name].dtype}")
+            
+            # Build the new state off to the side; buffers are only written past the
+            # published length, which no reader can see yet
+            needed = length + other_length
+            columns = dict(columns)
+            categories = dict(categories)
+            for name in columns:
+                values = other_columns[name]
+                if name in categories:
+                    # Map the other store's categories onto ours, adding any new ones
+                    positions = {value: code for code, value in enumerate(categories[name])}
+                    added = [value for value in other_categories[name] if value not in positions]
+                    if added:
+                        positions.update({value: len(positions) + i for i, value in enumerate(added)})
+                        categories[name] = np.concatenate((categories[name], np.array(added, dtype=object)))
+                    mapping = np.array([positions[value] for value in other_categories[name]], dtype=np.int64)
+                    values = mapping[values] if len(mapping) else values
+                    values = values.astype(np.min_scalar_type(max(len(categories[name]) - 1, 0)))
+                
+                buffer = self._buffers[name]
+                dtype = np.result_type(buffer.dtype, values.dtype)
+                if len(buffer) < needed or dtype != buffer.dtype:
+                    grown = np.empty(max(needed, 2 * len(buffer)), dtype=dtype)
+                    grown[:length] = buffer[:length]
+                    buffer = self._buffers[name] = grown
+                buffer[length:needed] = values
+                columns[name] = buffer[:needed]
+            
+            # Publish columns, categories and length in one assignment
+            self._state = (columns, categories, needed)
+    
+    def to_records(self):
+        """
+        Materialize the whole store as a list of nested dictionaries.
+        
+        Returns:
+            list: A list of dictionaries containing music data
+        """
+        return columns_to_records({name: self.column(name) for name in self.columns})
+
+class _SectionView(Mapping):
+    """Lazy read-only view of one section ('artist', 'song', ...) of a record."""
+    
+    def __init__(self, store, section, index):
+        self._store = store
+        self._section = section
+        self._index = index
+    
+    def __getitem__(self, field):
+        name = f"{self._section}.{field}"
+        if name in self._store.columns:
+            return self._store.value(name, self._index)
+        if self._section == "song" and field in _EMPTY_SONG_LISTS:
+            return []
+        raise KeyError(field)
+    
+    def _fields(self):
+        fields = list(self._store._sections.get(self._section, []))
+        if self._section == "song":
+            fields += _EMPTY_SONG_LISTS
+        return fields
+    
+    def __iter__(self):
+        return iter(self._fields())
+    
+    def __len__(self):
+        return len(self._fields())
+    
+    def __repr__(self):
+        return repr(dict(self))
+
+class _RecordView(Mapping):
+    """Lazy read-only view of one record of a MusicColumns store."""
+    
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+    
+    def __getitem__(self, section):
+        if section not in self._store._sections:
+            raise KeyError(section)
+        return _SectionView(self._store, section, self._index)
+    
+    def __iter__(self):
+        return iter(self._store._sections)
+    
+    def __len__(self):
+        return len(self._store._sections)
+    
+    def __repr__(self):
+        return repr(self.to_dict())
+    
+    def to_dict(self):
+        """Return the record as a plain nested dictionary."""
+        return {section: dict(self[section]) for section in self}
+
+def _field_column(name, values, categorical):
+    """Build one column from raw values; numeric fields use NaN for None."""
+    if categorical:
+        return np.array(values, dtype=object)
+    if any(isinstance(v, str) for v in values):
+        raise ValueError(f"Field '{name}' holds numbers but got a string")
+    if any(v is None for v in values):
+        return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.array(values)
+
+def _is_categorical(name, values, schema):
+    if schema is not None and name in schema.columns:
+        return name in schema.categories
+    return any(isinstance(v, str) for v in values)
+
+def records_to_columns(records, schema=None):
+    """
+    Convert nested record dictionaries into 'section.field' columns.
+    
+    Missing (None) values in numeric fields become NaN. String fields are those the
+    schema store encodes, or, without a schema, those holding any string.
+    
+    Args:
+        records (list): A list of dictionaries in the get_music record format
+        schema (MusicColumns, optional): A store whose string/numeric columns to follow
+        
+    Returns:
+        dict: Columns in the format generate_sample_music_columns returns
+    """
+    columns = {}
+    for section in ("artist", "release", "song"):
+        fields = [field for field in records[0][section] if not (section == "song" and field in _EMPTY_SONG_LISTS)] if records else []
+        for field in fields:
+            name = f"{section}.{field}"
+            values = [record[section].get(field) for record in records]
+            columns[name] = _field_column(name, values, _is_categorical(name, values, schema))
+    return columns
+
+def _conform_columns(columns, schema):
+    """Rebuild plain columns whose string/numeric kind does not match the schema store."""
+    conformed = {}
+    for name, column in columns.items():
+        column = np.asarray(column)
+        categorical = name in schema.categories
+        if categorical != (column.dtype.kind in ("O", "U", "S")):
+            column = _field_column(name, column.tolist(), categorical)
+        conformed[name] = column
+    return conformed
+
+# Size and seed of the default dataset
+DEFAULT_N_RECORDS = 500
+DEFAULT_SEED = 42
+
+# Records per independent random stream; fixed so the data does not depend on the worker count
+SHARD_SIZE = 1000000
+
+def _generate_shard(job):
+    """Generate one shard of records from its own seed as an encoded store."""
+    n_records, seed = job
+    return MusicColumns.from_columns(*_draw_music_columns(n_records, seed))
+
+def generate_music_columns(n_records=DEFAULT_N_RECORDS, seed=DEFAULT_SEED, workers=None, shard_size=SHARD_SIZE):
+    """
+    Generate a dataset of any size, in parallel for large requests.
+    
+    A request of at most shard_size records is drawn from a single generator seeded
+    with seed (the same data generate_sample_music_columns gives). Larger requests
+    are split into shards of shard_size records, each drawn from its own child of
+    np.random.SeedSequence(seed), and the shards are generated in worker processes.
+    Shard boundaries and seeds depend only on n_records, seed and shard_size, so the
+    result is the same for any number of workers.
+    
+    Args:
+        n_records (int, optional): Number of records. Defaults to DEFAULT_N_RECORDS.
+        seed (int, optional): Seed for the generators. Defaults to DEFAULT_SEED.
+        workers (int, optional): Worker processes. Defaults to the CPU count.
+        shard_size (int, optional): Records per shard. Defaults to SHARD_SIZE.
+        
+    Returns:
+        MusicColumns: The generated columnar dataset
+    """
+    n_records = int(n_records)
+    if n_records <= shard_size:
+        return _generate_shard((n_records, seed))
+    
+    n_shards = -(-n_records // shard_size)
+    sizes = [shard_size] * (n_shards - 1) + [n_records - shard_size * (n_shards - 1)]
+    jobs = list(zip(sizes, np.random.SeedSequence(seed).spawn(n_shards)))
+    
+    workers = min(workers or os.cpu_count() or 1, n_shards)
+    if workers <= 1:
+        shards = [_generate_shard(job) for job in jobs]
+    else:
+        context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            shards = list(executor.map(_generate_shard, jobs))
+    return MusicColumns.concat(shards)
+
+# Datasets kept in memory, keyed by (n_records, seed) and bounded by their total size
+# (override the cap with the MUSIC_DATASET_CACHE_BYTES environment variable)
+DATASET_CACHE = dataset_cache.DatasetCache(int(os.environ.get('MUSIC_DATASET_CACHE_BYTES', 2 * 1024 ** 3)))
+
+def _cached_dataset(key):
+    """The cached store for (n_records, seed) that ingest() appends to."""
+    def load():
+        # Load from the on-disk cache, generating typed columns on a cold start
+        import data_cache
+        return data_cache.load_music_columns(*key)
+    
+    return DATASET_CACHE.get_or_load(key, load)
+
+def get_music_columns(n_records=DEFAULT_N_RECORDS, seed=DEFAULT_SEED):
+    """
+    Get the music dataset as a columnar store.
+    
+    The store is a snapshot of the cached dataset: records ingested afterwards
+    (possibly from another thread) appear in later calls, never in one already returned.
+    
+    Args:
+        n_records (int, optional): Number of records. Defaults to DEFAULT_N_RECORDS.
+        seed (int, optional): Seed for the generator. Defaults to DEFAULT_SEED.
+        
+    Returns:
+        MusicColumns: The cached columnar music dataset
+    """
+    return _cached_dataset((int(n_records), seed)).snapshot()
+
+@instrumentation.instrument
+def get_music(n_records=DEFAULT_N_RECORDS, seed=DEFAULT_SEED):
     """
     Get the music dataset.
     
+    Args:
+        n_records (int, optional): Number of records. Defaults to DEFAULT_N_RECORDS.
+        seed (int, optional): Seed for the generator. Defaults to DEFAULT_SEED.
+        
+    Returns:
+        MusicColumns: A sequence of record views supporting record['song']['year']
+    """
+    return get_music_columns(n_records, seed)
+
+# Callbacks notified with each ingested batch
+_INGEST_LISTENERS = []
+
+def add_ingest_listener(callback):
+    """
+    Register a function to call with every batch passed to ingest().
+    
+    Args:
+        callback (callable): Called with the ingested batch as a MusicColumns store
+    """
+    _INGEST_LISTENERS.append(callback)
+
+def remove_ingest_listener(callback):
+    """
+    Stop notifying a callback registered with add_ingest_listener.
+    
+    Args:
+        callback (callable): A previously registered callback
+    """
+    if callback in _INGEST_LISTENERS:
+        _INGEST_LISTENERS.remove(callback)
+
+def ingest(batch):
+    """
+    Append new records to the in-memory default dataset without rebuilding it.
+    
+    Registered listeners (such as incremental.MusicState) are then given the batch so
+    they can update their derived state. Ingested records live only in memory; the
+    on-disk cache still holds the generated dataset.
+    
+    Args:
+        batch (list, dict or MusicColumns): Nested record dictionaries, generated
+            columns, or a columnar store
+        
     Returns:
-        list: A list of dictionaries containing music data
+        MusicColumns: The batch as a columnar store
+        
+    Raises:
+        ValueError: If the batch does not fit the dataset's columns; nothing is
+            appended and no listener is called
     """
-    global _DATASET
-    if _DATASET is None:
-        # Generate sample data
-        _DATASET = generate_sample_music_data(500)
-    return _DATASET
+    key = (DEFAULT_N_RECORDS, DEFAULT_SEED)
+    store = _cached_dataset(key)
+    
+    # Build the whole batch against the store's schema before touching the store
+    if isinstance(batch, dict):
+        batch = MusicColumns.from_columns(_conform_columns(batch, store))
+    elif not isinstance(batch, MusicColumns):
+        batch = MusicColumns.from_columns(records_to_columns(list(batch), schema=store))
+    
+    # Ingested records exist only in memory, so the default dataset must never be evicted
+    DATASET_CACHE.pin(key)
+    store.append(batch)
+    DATASET_CACHE.resize(key)
+    for callback in list(_INGEST_LISTENERS):
+        callback(batch)
+    return batch
 if __name__ == '__main__':
     from pprint import pprint
     
     # Test the function
     data = get_music()
     print(f"Generated {len(data)} sample music records.")
-    pprint(data[0])
+    pprint(data[0].to_dict())
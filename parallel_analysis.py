@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import analysis
+import aggregate_cube
+
+# Frame shared with forked workers; set just before the pool starts
+_SHARED_FRAME = None
+
+def _shard_partials(df):
+    """Compute every insight generator's mergeable partial aggregates for one row shard."""
+    partials = {}
+    if 'decade' in df.columns:
+        partials['decade'] = aggregate_cube.AggregateCube.from_frame(df)
+    if 'song_key' in df.columns and 'song_tempo' in df.columns:
+        partials['musical_attributes'] = analysis.musical_attributes_partials(df)
+    if 'artist_name' in df.columns and 'artist_hotttnesss' in df.columns:
+        partials['artist'] = analysis.artist_partials(df)
+    return partials
+
+def _shard_partials_by_range(bounds):
+    """Worker entry point: compute partials for rows [start, stop) of the shared frame."""
+    start, stop = bounds
+    return _shard_partials(_SHARED_FRAME.iloc[start:stop])
+
+def _shard_bounds(n_rows, n_shards):
+    edges = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+def generate_insights_parallel(df, workers=None, use_threads=False):
+    """
+    Generate the decade, musical attribute and artist insights over row shards in parallel.
+
+    The prepared frame is split into one row shard per worker. Each worker computes
+    mergeable partial aggregates for all three insight generators in one visit to its
+    shard; the partials are then combined and formatted exactly like the serial
+    analysis functions do. Process workers are forked so they read the frame without
+    pickling it; use_threads runs the shards on threads instead.
+
+    Args:
+        df (pandas.DataFrame): The prepared music dataframe
+        workers (int, optional): Number of workers. Defaults to the CPU count.
+        use_threads (bool, optional): Use a thread pool instead of a process pool. Defaults to False.
+
+    Returns:
+        dict: Insight text under 'decade', 'musical_attributes' and 'artist'
+    """
+    global _SHARED_FRAME
+
+    workers = workers or os.cpu_count() or 1
+    bounds = _shard_bounds(len(df), workers)
+
+    if workers == 1 or len(bounds) <= 1:
+        parts = [_shard_partials(df)]
+    elif use_threads or 'fork' not in multiprocessing.get_all_start_methods():
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(lambda b: _shard_partials(df.iloc[b[0]:b[1]]), bounds))
+    else:
+        _SHARED_FRAME = df
+        try:
+            context = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                parts = list(executor.map(_shard_partials_by_range, bounds))
+        finally:
+            _SHARED_FRAME = None
+
+    insights = {}
+
+    if 'decade' in parts[0]:
+        cube = aggregate_cube.AggregateCube()
+        for part in parts:
+            cube.merge(part['decade'])
+        insights['decade'] = analysis.get_decade_insights(df, cube=cube)
+    else:
+        insights['decade'] = analysis.get_decade_insights(df)
+
+    if 'musical_attributes' in parts[0]:
+        merged = analysis.merge_musical_attributes_partials([part['musical_attributes'] for part in parts])
+        insights['musical_attributes'] = analysis.format_musical_attributes_insights(merged)
+    else:
+        insights['musical_attributes'] = analysis.get_musical_attributes_insights(df)
+
+    if 'artist' in parts[0]:
+        merged = analysis.merge_artist_partials([part['artist'] for part in parts])
+        insights['artist'] = analysis.format_artist_insights(merged)
+    else:
+        insights['artist'] = analysis.get_artist_insights(df)
+
+    return insights
@@ -0,0 +1,320 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import music
+import data_loader
+import data_cleaner
+import analysis
+import Visualization
+
+# Dataset sizes the suite is designed for; DEFAULT_SIZES keeps a plain run short
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+DEFAULT_SIZES = [10**3, 10**4, 10**5]
+
+# Nested record frames hold one dict per section per row; above this they are skipped
+NESTED_MAX_RECORDS = 10**6
+
+# Timings below this are too noisy to flag as regressions
+MIN_COMPARABLE_SECONDS = 0.005
+
+def build_store(n_records, seed=music.DEFAULT_SEED):
+    """
+    Generate a columnar dataset of the given size with the production generator
+    (music.generate_music_columns, which get_music_columns uses on a cache miss).
+
+    Args:
+        n_records (int): Number of records
+        seed (int, optional): Random seed. Defaults to music.DEFAULT_SEED.
+
+    Returns:
+        music.MusicColumns: The generated dataset
+    """
+    return music.generate_music_columns(n_records, seed)
+
+def _close_figure(fig):
+    if hasattr(fig, 'savefig'):
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+
+def _figure_stage(builder):
+    """Time a Visualization builder and release its matplotlib figure afterwards."""
+    def run(df):
+        _close_figure(builder(df))
+    return run
+
+def _end_to_end(store):
+    """Flatten, clean and prepare a store, then build every insight and figure."""
+    df = data_cleaner.run_pipeline(data_loader.flatten_music_columns(store))
+    analysis.get_decade_insights(df)
+    analysis.get_musical_attributes_insights(df)
+    analysis.get_artist_insights(df)
+    for builder in FIGURE_BUILDERS:
+        _close_figure(builder(df))
+
+FIGURE_BUILDERS = [
+    Visualization.plot_decade_trend,
+    Visualization.plot_key_distribution,
+    Visualization.create_tempo_histogram,
+    Visualization.plot_loudness_vs_popularity,
+    Visualization.create_artist_location_map,
+]
+
+# Stage name -> (input, callable). The input names an entry of the per-size context
+# built by _build_context; frames are copied before every run so per-frame caches
+# (aggregate cubes, histograms, artist summaries) start cold each time.
+STAGES = {
+    'generate': ('n_records', build_store),
+    'load_music_data': ('store', lambda store: pd.DataFrame(store.to_records())),
+    'flatten_nested_features': ('nested', data_loader.flatten_nested_features),
+    'flatten_music_columns': ('store', data_loader.flatten_music_columns),
+    'clean_music_data': ('flat', data_cleaner.clean_music_data),
+    'handle_outliers': ('cleaned', data_cleaner.handle_outliers),
+    'prepare_data_for_analysis': ('cleaned', data_cleaner.prepare_data_for_analysis),
+    'get_decade_insights': ('prepared', analysis.get_decade_insights),
+    'get_musical_attributes_insights': ('prepared', analysis.get_musical_attributes_insights),
+    'get_artist_insights': ('prepared', analysis.get_artist_insights),
+    **{builder.__name__: ('prepared', _figure_stage(builder)) for builder in FIGURE_BUILDERS},
+    'end_to_end': ('store', _end_to_end),
+}
+
+# Stages that need the nested record frame (skipped above NESTED_MAX_RECORDS)
+_NESTED_STAGES = {'load_music_data', 'flatten_nested_features'}
+
+def _build_context(n_records, seed, stages):
+    """Build every stage input for one dataset size (untimed)."""
+    context = {'n_records': n_records, 'store': build_store(n_records, seed)}
+    if n_records <= NESTED_MAX_RECORDS and 'nested' in (STAGES[name][0] for name in stages):
+        context['nested'] = pd.DataFrame(context['store'].to_records())
+    context['flat'] = data_loader.flatten_music_columns(context['store'])
+    context['cleaned'] = data_cleaner.clean_music_data(context['flat'])
+    context['prepared'] = data_cleaner.prepare_data_for_analysis(context['cleaned'])
+    return context
+
+def _fresh(value):
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+def _current_rss():
+    """Resident set size in bytes, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux only); returns whether it worked."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss():
+    """Peak resident set size in bytes since the last reset (or process start)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measure_stage(run, make_input, repeats=3, trace_allocations=True, warmup=1):
+    """
+    Time a stage and measure its memory.
+
+    After `warmup` untimed runs (so one-time costs such as lazily imported plotting
+    libraries are not timed), the stage runs `repeats` times for wall time, once
+    more with the RSS high-water mark reset for peak RSS, and once under tracemalloc
+    for allocations (tracing slows the run down, so it is kept out of the timings).
+    Inputs are rebuilt before every run and their construction is not measured.
+
+    Args:
+        run (callable): The stage, called with one input
+        make_input (callable): Builds a fresh input
+        repeats (int, optional): Timed runs. Defaults to 3.
+        trace_allocations (bool, optional): Measure allocations with tracemalloc. Defaults to True.
+        warmup (int, optional): Untimed runs before the timed ones. Defaults to 1.
+
+    Returns:
+        dict: 'wall_min_s', 'wall_median_s', 'wall_mean_s', 'peak_rss_bytes',
+            'rss_delta_bytes' (peak above the RSS at the start, None if the
+            high-water mark cannot be reset), 'alloc_peak_bytes' and
+            'alloc_retained_bytes' (None when not traced)
+    """
+    for _ in range(warmup):
+        run(make_input())
+
+    times = []
+    for _ in range(repeats):
+        value = make_input()
+        gc.collect()
+        start = time.perf_counter()
+        run(value)
+        times.append(time.perf_counter() - start)
+        del value
+
+    value = make_input()
+    gc.collect()
+    rss_before = _current_rss()
+    reset = _reset_peak_rss()
+    result = run(value)
+    peak_rss = _peak_rss()
+    del value, result
+
+    alloc_peak = alloc_retained = None
+    if trace_allocations:
+        value = make_input()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = run(value)
+            alloc_retained, alloc_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del value, result
+
+    return {
+        'wall_min_s': min(times),
+        'wall_median_s': statistics.median(times),
+        'wall_mean_s': statistics.mean(times),
+        'peak_rss_bytes': peak_rss,
+        'rss_delta_bytes': max(peak_rss - rss_before, 0) if reset and rss_before is not None else None,
+        'alloc_peak_bytes': alloc_peak,
+        'alloc_retained_bytes': alloc_retained,
+    }
+
+def run_benchmarks(sizes=None, stages=None, repeats=3, seed=music.DEFAULT_SEED, trace_allocations=True,
+                   progress=None):
+    """
+    Run the selected stages at every dataset size.
+
+    Args:
+        sizes (list, optional): Record counts. Defaults to DEFAULT_SIZES.
+        stages (list, optional): Names from STAGES. If None, all of them.
+        repeats (int, optional): Timed runs per stage. Defaults to 3.
+        seed (int, optional): Dataset seed. Defaults to music.DEFAULT_SEED.
+        trace_allocations (bool, optional): Measure allocations with tracemalloc. Defaults to True.
+        progress (callable, optional): Called with each result as it is produced.
+
+    Returns:
+        dict: 'meta' (environment and settings) and 'results' (one dict per size and
+            stage with the measure_stage fields, or 'skipped' with a reason)
+    """
+    stages = list(STAGES) if stages is None else list(stages)
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(unknown)}")
+
+    results = []
+    for n_records in sizes or DEFAULT_SIZES:
+        context = _build_context(n_records, seed, stages)
+        for name in stages:
+            source, run = STAGES[name]
+            entry = {'size': n_records, 'stage': name}
+            if name in _NESTED_STAGES and n_records > NESTED_MAX_RECORDS:
+                entry['skipped'] = f"nested frames are only built up to {NESTED_MAX_RECORDS} records"
+            else:
+                entry['rows'] = n_records if source in ('n_records', 'store', 'nested') else len(context[source])
+                entry.update(measure_stage(run, lambda: _fresh(context[source]), repeats, trace_allocations))
+            results.append(entry)
+            if progress is not None:
+                progress(entry)
+        del context
+        gc.collect()
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeats': repeats,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """
+    Find stages that got slower or allocate more than in a baseline report.
+
+    Args:
+        report (dict): Output of run_benchmarks
+        baseline (dict): An earlier run_benchmarks output
+        tolerance (float, optional): Allowed relative increase. Defaults to 0.2 (20%).
+
+    Returns:
+        list: (size, stage, metric, baseline value, current value) per regression
+    """
+    previous = {(entry['size'], entry['stage']): entry for entry in baseline['results'] if 'skipped' not in entry}
+    regressions = []
+    for entry in report['results']:
+        before = previous.get((entry['size'], entry['stage']))
+        if before is None or 'skipped' in entry:
+            continue
+        for metric in ('wall_median_s', 'alloc_peak_bytes'):
+            old, new = before.get(metric), entry.get(metric)
+            if old is None or new is None:
+                continue
+            if metric == 'wall_median_s' and old < MIN_COMPARABLE_SECONDS:
+                continue
+            if new > old * (1 + tolerance):
+                regressions.append((entry['size'], entry['stage'], metric, old, new))
+    return regressions
+
+def _print_result(entry):
+    if 'skipped' in entry:
+        print(f"{entry['size']:>10}  {entry['stage']:<32}  skipped ({entry['skipped']})")
+        return
+    mb = 1024 * 1024
+    rss = f"{entry['rss_delta_bytes'] / mb:10.1f}" if entry['rss_delta_bytes'] is not None else f"{'-':>10}"
+    alloc = f"{entry['alloc_peak_bytes'] / mb:10.1f}" if entry['alloc_peak_bytes'] is not None else f"{'-':>10}"
+    print(f"{entry['size']:>10}  {entry['stage']:<32}{entry['wall_median_s'] * 1000:12.2f}{rss}{alloc}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the music pipeline at several dataset sizes.")
+    parser.add_argument('--sizes', nargs='+', type=lambda value: int(float(value)), default=DEFAULT_SIZES,
+                        help="Record counts, e.g. 1e3 1e5 1e7")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), help="Stages to run (default: all)")
+    parser.add_argument('--repeats', type=int, default=3, help="Timed runs per stage")
+    parser.add_argument('--seed', type=int, default=music.DEFAULT_SEED, help="Dataset seed")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="Skip the allocation-tracing run")
+    parser.add_argument('--output', default='bench_results.json', help="Where to write the JSON report")
+    parser.add_argument('--baseline', help="Report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative increase vs the baseline")
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    print(f"{'Records':>10}  {'Stage':<32}{'Median ms':>12}{'RSS MB':>10}{'Alloc MB':>10}")
+    report = run_benchmarks(args.sizes, args.stages, args.repeats, args.seed,
+                            trace_allocations=not args.no_tracemalloc, progress=_print_result)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for size, stage, metric, before, after in regressions:
+            print(f"REGRESSION {stage} @ {size} records: {metric} {before:.4g} -> {after:.4g}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# Items kept per level; the rank error shrinks roughly as 1/k
+DEFAULT_K = 1024
+
+# Blocks of k values that update() sorts and compacts together
+UPDATE_BLOCKS = 64
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch.
+
+    Values are kept in levels; an item at level h stands for 2**h original values.
+    When a level holds more than k items it is sorted and every other item (starting
+    at a random offset) is promoted to the next level. Memory is O(k log(n / k)).
+
+    Error bounds: with the default k=1024 the rank of a returned quantile is within
+    about 0.5% of n of the true rank with high probability (typically under 0.1%);
+    doubling k roughly halves that. A quantile returned for q lies between the exact
+    quantiles for q - eps and q + eps, so on a smooth column the value error is small
+    relative to the inter-quartile range.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        """
+        Args:
+            k (int, optional): Items kept per level. Defaults to DEFAULT_K.
+            seed (int, optional): Seed for the compaction offsets. Defaults to 0.
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """
+        Add an array of values (NaNs are ignored).
+
+        Values are fed in chunks of UPDATE_BLOCKS * k and compacted as they arrive, a
+        whole block of k at a time, so an update costs O(n log k) time and at most
+        one chunk of extra memory.
+
+        Args:
+            values (array-like): Values to add
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        chunk_size = UPDATE_BLOCKS * self.k
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            chunk = chunk[~np.isnan(chunk)]
+            self.count += len(chunk)
+            self._feed(chunk)
+
+    def add_weighted(self, value, weight):
+        """
+        Add one value repeated weight times without materializing the repeats.
+
+        Args:
+            value (float): The value to add
+            weight (int): Number of times it occurs
+        """
+        weight = int(weight)
+        if weight <= 0 or np.isnan(value):
+            return
+        self.count += weight
+        h = 0
+        while weight:
+            if weight & 1:
+                self._ensure_level(h)
+                self.levels[h] = np.append(self.levels[h], value)
+            weight >>= 1
+            h += 1
+        self._compact()
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other (QuantileSketch): Sketch built over other values
+        """
+        self.count += other.count
+        for h, items in enumerate(other.levels):
+            self._ensure_level(h)
+            self.levels[h] = np.concatenate((self.levels[h], items))
+        self._compact()
+
+    def quantiles(self, qs):
+        """
+        Estimate several quantiles at once.
+
+        Args:
+            qs (list): Quantiles between 0 and 1
+
+        Returns:
+            list: The estimated quantile values (NaN for an empty sketch)
+        """
+        if self.count == 0:
+            return [np.nan for _ in qs]
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.float64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        items = items[order]
+        cumulative = np.cumsum(weights[order])
+        ranks = np.asarray(qs, dtype=np.float64) * cumulative[-1]
+        indexes = np.minimum(np.searchsorted(cumulative, ranks, side='left'), len(items) - 1)
+        return items[indexes].tolist()
+
+    def quantile(self, q):
+        """Estimate a single quantile."""
+        return self.quantiles([q])[0]
+
+    def _ensure_level(self, h):
+        while len(self.levels) <= h:
+            self.levels.append(np.empty(0))
+
+    def _feed(self, items):
+        """Add items to level 0, compacting full blocks of k level by level."""
+        block = self.k - self.k % 2  # Compacted blocks pair up every item
+        h = 0
+        while len(items):
+            self._ensure_level(h)
+            items = np.concatenate((self.levels[h], items))
+            if len(items) <= self.k:
+                self.levels[h] = items
+                break
+            n_blocks = len(items) // block
+            blocks = np.sort(items[:n_blocks * block].reshape(n_blocks, block), axis=1)
+            # Promote every other item of each sorted block, from a random offset per block
+            offsets = self._rng.integers(0, 2, size=(n_blocks, 1)).astype(bool)
+            self.levels[h] = items[n_blocks * block:]
+            items = np.where(offsets, blocks[:, 1::2], blocks[:, 0::2]).ravel()
+            h += 1
+
+    def _compact(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self.k:
+                level = np.sort(level)
+                # An odd item stays behind so no weight is lost
+                keep = level[-1:] if len(level) % 2 else level[:0]
+                pairs = level[:len(level) - len(keep)]
+                promoted = pairs[self._rng.integers(0, 2)::2]
+                self.levels[h] = keep
+                self._ensure_level(h + 1)
+                self.levels[h + 1] = np.concatenate((self.levels[h + 1], promoted))
+            h += 1
+
+def sketch_columns(df, columns=None, k=DEFAULT_K):
+    """
+    Build one quantile sketch per numeric column in a single pass over the frame.
+
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        columns (list, optional): Columns to sketch. If None, all numeric columns.
+        k (int, optional): Items kept per sketch level. Defaults to DEFAULT_K.
+
+    Returns:
+        dict: A QuantileSketch per column; sketches from different chunks can be merged
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=['float64', 'int64']).columns
+    sketches = {}
+    for col in columns:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            sketch = QuantileSketch(k)
+            sketch.update(df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+            sketches[col] = sketch
+    return sketches
+
+def column_quartiles(df, columns=None, k=DEFAULT_K):
+    """
+    Estimate Q1, median and Q3 for every numeric column.
+
+    Args:
+        df (pandas.DataFrame): Input dataframe
+        columns (list, optional): Columns to process. If None, all numeric columns.
+        k (int, optional): Items kept per sketch level. Defaults to DEFAULT_K.
+
+    Returns:
+        dict: (Q1, median, Q3) per column
+    """
+    return {col: tuple(sketch.quantiles([0.25, 0.5, 0.75])) for col, sketch in sketch_columns(df, columns, k).items()}
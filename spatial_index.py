@@ -0,0 +1,206 @@
+import numpy as np
+import pandas as pd
+
+import frame_cache
+import music
+
+# Mean Earth radius used for haversine distances
+EARTH_RADIUS_KM = 6371.0088
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between points given in degrees.
+
+    Args:
+        lat1, lon1 (float or array-like): First point(s)
+        lat2, lon2 (float or array-like): Second point(s)
+
+    Returns:
+        numpy.ndarray: Distances in kilometres
+    """
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=np.float64)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+class ArtistSpatialIndex:
+    """
+    Uniform lat/lon grid index over artist coordinates.
+
+    Points are sorted by grid cell once, so each cell's points are a contiguous
+    slice found with two array lookups. Queries only visit the cells that overlap
+    the query region and then filter those candidates exactly.
+    """
+
+    def __init__(self, latitude, longitude, cell_degrees=5.0):
+        """
+        Args:
+            latitude (array-like): Latitudes in degrees (NaN rows are not indexed)
+            longitude (array-like): Longitudes in degrees (NaN rows are not indexed)
+            cell_degrees (float, optional): Grid cell size in degrees. Defaults to 5.0.
+        """
+        latitude = np.asarray(latitude, dtype=np.float64)
+        longitude = np.asarray(longitude, dtype=np.float64)
+        self.cell_degrees = float(cell_degrees)
+        self.n_rows = int(np.ceil(180 / self.cell_degrees))
+        self.n_cols = int(np.ceil(360 / self.cell_degrees))
+
+        # Row ids of indexed points, sorted by cell
+        ids = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+        cells = self._cells(latitude[ids], longitude[ids])
+        order = np.argsort(cells, kind='stable')
+        self.ids = ids[order]
+        self.latitude = latitude[self.ids]
+        self.longitude = longitude[self.ids]
+        self.cell_starts = np.searchsorted(cells[order], np.arange(self.n_rows * self.n_cols + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row_col(self, latitude, longitude):
+        row = np.clip(((np.asarray(latitude) + 90) // self.cell_degrees).astype(np.int64), 0, self.n_rows - 1)
+        col = np.clip(((np.asarray(longitude) + 180) // self.cell_degrees).astype(np.int64), 0, self.n_cols - 1)
+        return row, col
+
+    def _cells(self, latitude, longitude):
+        row, col = self._row_col(latitude, longitude)
+        return row * self.n_cols + col
+
+    def _candidates(self, rows, cols):
+        """Positions (into the sorted arrays) of every point in the given grid rows x cols."""
+        cells = (np.asarray(rows)[:, None] * self.n_cols + np.asarray(cols)[None, :]).ravel()
+        starts = self.cell_starts[cells]
+        stops = self.cell_starts[cells + 1]
+        if not len(cells) or (stops - starts).sum() == 0:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops) if stop > start])
+
+    def bbox_query(self, lat_min, lat_max, lon_min, lon_max):
+        """
+        Find points inside a bounding box.
+
+        A box with lon_min > lon_max wraps across the antimeridian.
+
+        Args:
+            lat_min, lat_max (float): Latitude range in degrees
+            lon_min, lon_max (float): Longitude range in degrees
+
+        Returns:
+            numpy.ndarray: Row ids of the matching points
+        """
+        row_min, col_min = self._row_col(lat_min, lon_min)
+        row_max, col_max = self._row_col(lat_max, lon_max)
+        rows = np.arange(row_min, row_max + 1)
+        if lon_min <= lon_max:
+            cols = np.arange(col_min, col_max + 1)
+        else:
+            cols = np.concatenate((np.arange(col_min, self.n_cols), np.arange(0, col_max + 1)))
+
+        positions = self._candidates(rows, cols)
+        lat = self.latitude[positions]
+        lon = self.longitude[positions]
+        inside = (lat >= lat_min) & (lat <= lat_max)
+        if lon_min <= lon_max:
+            inside &= (lon >= lon_min) & (lon <= lon_max)
+        else:
+            inside &= (lon >= lon_min) | (lon <= lon_max)
+        return self.ids[positions[inside]]
+
+    def _radius_positions(self, latitude, longitude, radius_km):
+        """Positions and distances of the points within radius_km of a location."""
+        radius_degrees = np.degrees(radius_km / EARTH_RADIUS_KM)
+        lat_min = max(latitude - radius_degrees, -90.0)
+        lat_max = min(latitude + radius_degrees, 90.0)
+        row_min, _ = self._row_col(lat_min, 0)
+        row_max, _ = self._row_col(lat_max, 0)
+        rows = np.arange(row_min, row_max + 1)
+
+        # Widen the longitude span by the narrowest parallel the circle touches
+        widest_lat = max(abs(lat_min), abs(lat_max))
+        if widest_lat >= 90 or radius_degrees >= 90:
+            cols = np.arange(self.n_cols)
+        else:
+            lon_span = radius_degrees / np.cos(np.radians(widest_lat))
+            wraps = longitude - lon_span < -180 or longitude + lon_span > 180
+            _, col_min = self._row_col(0, ((longitude - lon_span + 180) % 360) - 180)
+            _, col_max = self._row_col(0, ((longitude + lon_span + 180) % 360) - 180)
+            if 2 * lon_span + self.cell_degrees >= 360 or (wraps and col_min <= col_max):
+                # The span covers every column (its wrapped ends may even share one)
+                cols = np.arange(self.n_cols)
+            elif wraps:
+                cols = np.concatenate((np.arange(col_min, self.n_cols), np.arange(0, col_max + 1)))
+            else:
+                cols = np.arange(col_min, col_max + 1)
+
+        positions = self._candidates(rows, cols)
+        distances = haversine_km(latitude, longitude, self.latitude[positions], self.longitude[positions])
+        within = distances <= radius_km
+        return positions[within], distances[within]
+
+    def radius_query(self, latitude, longitude, radius_km):
+        """
+        Find points within a great-circle distance of a location.
+
+        Args:
+            latitude, longitude (float): Query location in degrees
+            radius_km (float): Search radius in kilometres
+
+        Returns:
+            tuple: (row ids, distances in km) sorted by distance
+        """
+        positions, distances = self._radius_positions(latitude, longitude, radius_km)
+        order = np.argsort(distances, kind='stable')
+        return self.ids[positions[order]], distances[order]
+
+    def nearest(self, latitude, longitude, k=5):
+        """
+        Find the k nearest points to a location.
+
+        The search radius starts at one cell and doubles until it holds k points,
+        so the result is exact.
+
+        Args:
+            latitude, longitude (float): Query location in degrees
+            k (int, optional): Number of neighbours. Defaults to 5.
+
+        Returns:
+            tuple: (row ids, distances in km) of up to k points, nearest first
+        """
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        radius_km = np.radians(self.cell_degrees) * EARTH_RADIUS_KM
+        half_circumference = np.pi * EARTH_RADIUS_KM
+        while True:
+            positions, distances = self._radius_positions(latitude, longitude, radius_km)
+            if len(positions) >= k or radius_km >= half_circumference:
+                break
+            radius_km *= 2
+        nearest = np.argpartition(distances, k - 1)[:k] if len(distances) > k else np.arange(len(distances))
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        return self.ids[positions[nearest]], distances[nearest]
+
+# Indexes built by index_for, keyed by the content of the coordinates they index
+_INDEXES = frame_cache.FrameCache()
+
+def index_for(store=None, cell_degrees=5.0):
+    """
+    Get the spatial index of a columnar dataset, building it once and reusing it.
+
+    The index is rebuilt if the store's coordinates changed since it was built
+    (e.g. records were appended).
+
+    Args:
+        store (music.MusicColumns, optional): The dataset. If None, music.get_music_columns().
+        cell_degrees (float, optional): Grid cell size in degrees. Defaults to 5.0.
+
+    Returns:
+        ArtistSpatialIndex: Index over artist.latitude/artist.longitude; its row ids
+            are record indexes of the store
+    """
+    if store is None:
+        store = music.get_music_columns()
+    latitude = store.columns['artist.latitude']
+    longitude = store.columns['artist.longitude']
+    coordinates = pd.DataFrame({'latitude': latitude, 'longitude': longitude}, copy=False)
+    return _INDEXES.get_or_build(coordinates, None, lambda: ArtistSpatialIndex(latitude, longitude, cell_degrees),
+                                 cell_degrees)
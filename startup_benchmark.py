@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Modules whose cold import cost is tracked
+ENTRY_POINTS = [
+    'music',
+    'data_loader',
+    'data_cleaner',
+    'analysis',
+    'parallel_analysis',
+    'Visualization',
+    'main',
+    'MusicalAttributions',
+    'ArtistLocationMap',
+    'MapPlot',
+    'batch_report',
+]
+
+# Heavy optional dependencies that headless entry points should not pull in
+HEAVY_MODULES = ['streamlit', 'plotly', 'matplotlib']
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def parse_importtime(stderr):
+    """
+    Parse the report written by `python -X importtime`.
+
+    Args:
+        stderr (str): The interpreter's stderr
+
+    Returns:
+        dict: For each top-level import, its cumulative time in microseconds under
+            'us' and the cumulative time of each of its direct imports under 'children'
+    """
+    imports = {}
+    children = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or line.count('|') != 2:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        if not cumulative_us.strip().isdigit():
+            continue  # The header line
+        depth = (len(name) - len(name.lstrip())) // 2 + 1
+        # Entries are printed after their own imports, so children come first
+        if depth == 1:
+            imports[name.strip()] = {'us': int(cumulative_us), 'children': children}
+            children = {}
+        elif depth == 2:
+            children[name.strip()] = int(cumulative_us)
+    return imports
+
+def measure_entry_point(module, repeats=5):
+    """
+    Import a module in fresh interpreters and measure its cold-start cost.
+
+    Each run is `python -X importtime -c "import <module>"` in a new process, so
+    nothing is cached in memory between runs (bytecode caches on disk are warmed
+    by an untimed first run).
+
+    Args:
+        module (str): Module name to import
+        repeats (int, optional): Timed runs. Defaults to 5.
+
+    Returns:
+        dict: Median 'import_ms' of the module, the median cost of its five
+            'heaviest' direct imports (name -> ms), and which HEAVY_MODULES got imported
+    """
+    check = f"import {module}, sys; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    command = [sys.executable, '-X', 'importtime', '-c', check]
+    env = dict(os.environ, MPLBACKEND='Agg')
+
+    subprocess.run(command, cwd=_REPO_DIR, env=env, capture_output=True, text=True)  # Warm bytecode caches
+
+    totals = []
+    per_import = {}
+    heavy = []
+    for _ in range(repeats):
+        result = subprocess.run(command, cwd=_REPO_DIR, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        entry = parse_importtime(result.stderr)[module]
+        totals.append(entry['us'] / 1000)
+        for name, us in entry['children'].items():
+            per_import.setdefault(name, []).append(us / 1000)
+        heavy = [name for name in result.stdout.strip().split(',') if name]
+
+    heaviest = sorted(((name, statistics.median(ms)) for name, ms in per_import.items()),
+                      key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'module': module,
+        'import_ms': statistics.median(totals),
+        'heaviest': dict(heaviest),
+        'heavy_modules': heavy,
+    }
+
+def run_benchmark(modules=None, repeats=5):
+    """
+    Measure every entry point.
+
+    Args:
+        modules (list, optional): Modules to measure. Defaults to ENTRY_POINTS.
+        repeats (int, optional): Timed runs per module. Defaults to 5.
+
+    Returns:
+        list: One measure_entry_point result per module
+    """
+    return [measure_entry_point(module, repeats) for module in modules or ENTRY_POINTS]
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    """
+    Flag entry points whose import time grew beyond the tolerance.
+
+    Args:
+        results (list): Output of run_benchmark
+        baseline (list): An earlier run_benchmark output
+        tolerance (float, optional): Allowed relative slowdown. Defaults to 0.2 (20%).
+
+    Returns:
+        list: (module, baseline ms, current ms) for each regression
+    """
+    previous = {entry['module']: entry['import_ms'] for entry in baseline}
+    return [(entry['module'], previous[entry['module']], entry['import_ms'])
+            for entry in results
+            if entry['module'] in previous and entry['import_ms'] > previous[entry['module']] * (1 + tolerance)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of each entry point.")
+    parser.add_argument('modules', nargs='*', help="Modules to measure (default: all entry points)")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed runs per module")
+    parser.add_argument('--json', help="Write the results to this JSON file")
+    parser.add_argument('--baseline', help="Compare against a JSON file written by --json")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed relative slowdown vs the baseline")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.modules, args.repeats)
+
+    print(f"{'Entry point':<22}{'Import ms':>10}  Heavy deps loaded")
+    for entry in results:
+        print(f"{entry['module']:<22}{entry['import_ms']:>10.1f}  {', '.join(entry['heavy_modules']) or '-'}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f), args.tolerance)
+        for module, before, after in regressions:
+            print(f"REGRESSION {module}: {before:.1f} ms -> {after:.1f} ms")
+        sys.exit(1 if regressions else 0)
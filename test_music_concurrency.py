@@ -0,0 +1,80 @@
+import threading
+
+import numpy as np
+import pytest
+
+import data_cache
+import main
+import music
+
+@pytest.fixture
+def default_dataset(tmp_path, monkeypatch):
+    """The default dataset, loaded from a private cache and dropped after the test."""
+    monkeypatch.setattr(data_cache, 'CACHE_DIR', str(tmp_path))
+    key = (music.DEFAULT_N_RECORDS, music.DEFAULT_SEED)
+    music.DATASET_CACHE.discard(key)
+    yield key
+    music.DATASET_CACHE.unpin(key)
+    music.DATASET_CACHE.discard(key)
+
+def _run_concurrently(writer, reader, duration_writes):
+    errors = []
+    done = threading.Event()
+
+    def read_until_done():
+        try:
+            while not done.is_set():
+                reader()
+        except Exception as error:
+            errors.append(error)
+
+    thread = threading.Thread(target=read_until_done)
+    thread.start()
+    try:
+        for i in range(duration_writes):
+            writer(i)
+    finally:
+        done.set()
+        thread.join()
+    return errors
+
+def test_readers_see_consistent_stores_during_ingest(default_dataset):
+    batch = music.generate_music_columns(20000, seed=7, workers=1)
+    lengths = []
+
+    def reader():
+        data = music.get_music()
+        df, n_songs = main.popularity_by_year(data)
+        assert {len(column) for column in data.columns.values()} == {len(data)}
+        lengths.append(len(data))
+
+    errors = _run_concurrently(lambda i: music.ingest(batch), reader, 15)
+    assert errors == []
+    assert len(music.get_music()) == music.DEFAULT_N_RECORDS + 15 * len(batch)
+    assert lengths == sorted(lengths)
+
+def test_concurrent_appends_keep_every_record():
+    store = music.generate_music_columns(1000, seed=1, workers=1)
+    batches = [music.generate_music_columns(500, seed=seed, workers=1) for seed in range(2, 10)]
+
+    threads = [threading.Thread(target=store.append, args=(batch,)) for batch in batches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(store) == 1000 + 8 * 500
+    assert {len(column) for column in store.columns.values()} == {len(store)}
+    expected = sorted(np.concatenate([batch.column('song.tempo') for batch in batches]).tolist())
+    assert sorted(store.column('song.tempo')[1000:].tolist()) == expected
+
+def test_snapshot_does_not_see_later_appends():
+    store = music.generate_music_columns(1000, seed=1, workers=1)
+    snapshot = store.snapshot()
+    names = snapshot.column('artist.name').copy()
+    store.append(music.generate_music_columns(300, seed=2, workers=1))
+
+    assert len(snapshot) == 1000
+    assert len(store) == 1300
+    assert np.array_equal(snapshot.column('artist.name'), names)
+    assert np.array_equal(store.column('artist.name')[:1000], names)
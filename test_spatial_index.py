@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+import spatial_index
+
+def _points(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    latitude = rng.uniform(-90, 90, n)
+    longitude = rng.uniform(-180, 180, n)
+    latitude[::50] = np.nan  # Unindexed rows
+    return latitude, longitude
+
+def _brute_force(latitude, longitude, lat, lon, radius_km):
+    distances = spatial_index.haversine_km(lat, lon, latitude, longitude)
+    return np.flatnonzero(distances <= radius_km), distances
+
+def _queries(seed=1):
+    rng = np.random.default_rng(seed)
+    queries = [
+        (-77.9977, 144.0626, 1011.6),  # Longitude span close to 180 degrees
+        (89.9, 0.0, 500.0),
+        (-89.5, 179.9, 2000.0),
+        (0.0, 179.9, 800.0),  # Across the antimeridian
+        (0.0, -179.9, 800.0),
+        (45.0, 10.0, 19000.0),  # Almost the whole globe
+        (10.0, -50.0, 10000.0),
+    ]
+    for _ in range(200):
+        queries.append((rng.uniform(-90, 90), rng.uniform(-180, 180), rng.uniform(1, 3000)))
+    for _ in range(100):
+        # Polar queries and very large radii
+        queries.append((rng.choice([-1, 1]) * rng.uniform(60, 90), rng.uniform(-180, 180), rng.uniform(100, 20000)))
+    return queries
+
+@pytest.mark.parametrize('cell_degrees', [5.0, 7.0, 2.0])
+def test_radius_query_matches_brute_force(cell_degrees):
+    latitude, longitude = _points()
+    index = spatial_index.ArtistSpatialIndex(latitude, longitude, cell_degrees)
+    for lat, lon, radius_km in _queries():
+        ids, distances = index.radius_query(lat, lon, radius_km)
+        expected, all_distances = _brute_force(latitude, longitude, lat, lon, radius_km)
+        assert np.array_equal(np.sort(ids), expected), (lat, lon, radius_km)
+        assert np.allclose(distances, all_distances[ids])
+        assert np.all(np.diff(distances) >= 0)
+
+@pytest.mark.parametrize('cell_degrees', [5.0, 7.0])
+def test_nearest_matches_brute_force(cell_degrees):
+    latitude, longitude = _points()
+    index = spatial_index.ArtistSpatialIndex(latitude, longitude, cell_degrees)
+    for lat, lon, _ in _queries()[:150]:
+        ids, distances = index.nearest(lat, lon, k=7)
+        all_distances = spatial_index.haversine_km(lat, lon, latitude, longitude)
+        expected = np.sort(all_distances[~np.isnan(all_distances)])[:7]
+        assert np.allclose(distances, expected), (lat, lon)
+        assert np.allclose(all_distances[ids], distances)
+
+def test_nearest_with_sparse_polar_points():
+    latitude = np.array([89.0, -89.0, 0.0])
+    longitude = np.array([-179.0, 179.0, 0.0])
+    index = spatial_index.ArtistSpatialIndex(latitude, longitude)
+    ids, _ = index.nearest(88.0, 1.0, k=3)
+    assert ids.tolist() == [0, 2, 1]
+
+def test_bbox_query_matches_brute_force():
+    latitude, longitude = _points()
+    index = spatial_index.ArtistSpatialIndex(latitude, longitude)
+    rng = np.random.default_rng(2)
+    for _ in range(100):
+        lat_min, lat_max = np.sort(rng.uniform(-90, 90, 2))
+        lon_min, lon_max = rng.uniform(-180, 180, 2)  # lon_min > lon_max wraps
+        ids = index.bbox_query(lat_min, lat_max, lon_min, lon_max)
+        inside = (latitude >= lat_min) & (latitude <= lat_max)
+        if lon_min <= lon_max:
+            inside &= (longitude >= lon_min) & (longitude <= lon_max)
+        else:
+            inside &= (longitude >= lon_min) | (longitude <= lon_max)
+        assert np.array_equal(np.sort(ids), np.flatnonzero(inside))